@@ -1,7 +1,9 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Request
+from api.middleware import FastCORSMiddleware, ExceptionMiddleware
+from api.responses import ORJSONResponse, dumps
 from api.routers import query, documents, system
+from contextlib import asynccontextmanager
+import sys
 import os
 from pathlib import Path
 
@@ -25,22 +27,99 @@ except ImportError:
 for directory in [DATA_DIR, DOCUMENTS_DIR, CACHE_DIR, EMBEDDINGS_DIR, CELERY_RESULTS_DIR]:
     os.makedirs(directory, exist_ok=True)
 
+# Sample document written on first start, encoded once at import
+SAMPLE_DOCUMENT = """Local RAG System Documentation
+
+This is a sample document for the Local RAG (Retrieval-Augmented Generation) system.
+
+The system uses:
+- Llama 3.2 1B model for text generation
+- all-MiniLM-L6-v2 for creating embeddings
+- FAISS for efficient vector similarity search
+- FastAPI for the REST API interface
+- Celery for asynchronous task processing
+
+Key Features:
+1. Local execution - no cloud dependencies
+2. Document processing and indexing
+3. Semantic search capabilities
+4. Response caching for improved performance
+5. Asynchronous task processing
+6. RESTful API interface
+
+To use the system:
+1. Place your documents in the data/documents/ directory
+2. Call the /documents/process endpoint to index them
+3. Use the /query endpoint to ask questions
+4. Monitor task progress using the task status endpoints
+
+The system is optimized for CPU-only execution and provides comprehensive API documentation through Swagger UI and ReDoc interfaces."""
+SAMPLE_DOCUMENT_BYTES = SAMPLE_DOCUMENT.encode('utf-8')
+
+def _directory_is_empty(path):
+    """Check for directory entries without listing the whole directory"""
+    with os.scandir(path) as entries:
+        return next(entries, None) is None
+
+# Application lifespan
+@asynccontextmanager
+async def lifespan(app):
+    """Startup and shutdown handler"""
+    print(f"Starting {API_TITLE} v{API_VERSION}")
+    print(f"API Documentation: http://localhost:8080/docs")
+    print(f"Alternative Docs: http://localhost:8080/redoc")
+    
+    # Create a sample document if documents directory is empty
+    if _directory_is_empty(DOCUMENTS_DIR):
+        sample_doc_path = os.path.join(DOCUMENTS_DIR, "sample_document.txt")
+        fd = os.open(sample_doc_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, SAMPLE_DOCUMENT_BYTES)
+        finally:
+            os.close(fd)
+        print(f"Created sample document: {sample_doc_path}")
+    
+    # Build the shared RAG engine once; routers read it from app.state
+    try:
+        from rag.engine import RAGEngine
+        app.state.rag_engine = RAGEngine()
+        app.state.rag_engine_error = None
+        # Tasks running inline in this process share the engine instead of loading a second one
+        from tasks.celery_app import TASK_ALWAYS_EAGER, set_engine
+        if TASK_ALWAYS_EAGER:
+            set_engine(app.state.rag_engine)
+    except Exception as e:
+        print(f"Error initializing RAG engine: {e}")
+        app.state.rag_engine = None
+        app.state.rag_engine_error = str(e)
+    
+    # Build and serialize the OpenAPI schema now so the first /docs visit doesn't pay for it
+    app.state.openapi_bytes = dumps(app.openapi())
+    
+    yield
+    
+    print(f"Shutting down {API_TITLE}")
+
 # Create FastAPI app
 app = FastAPI(
     title=API_TITLE,
     description=API_DESCRIPTION,
     version=API_VERSION,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
-# Add CORS middleware
+# Add error handling and CORS middleware (the last one added runs outermost)
+app.add_middleware(ExceptionMiddleware)
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
-    allow_credentials=True,
+    FastCORSMiddleware,
+    allow_origin="*",  # Configure appropriately for production
     allow_methods=["*"],
     allow_headers=["*"],
+    allow_credentials=True,
+    max_age=86400,
 )
 
 # Include routers
@@ -48,6 +127,15 @@ app.include_router(query.router)
 app.include_router(documents.router)
 app.include_router(system.router)
 
+# Replace the default schema route, which re-encodes the schema on every request
+app.router.routes[:] = [route for route in app.router.routes if getattr(route, "path", None) != app.openapi_url]
+
+@app.get(app.openapi_url, include_in_schema=False)
+async def openapi_json(request: Request):
+    """Serve the OpenAPI schema serialized at startup"""
+    # Fall back to building it when the lifespan has not run (e.g. a TestClient without a with-block)
+    return ORJSONResponse(getattr(request.app.state, "openapi_bytes", None) or dumps(app.openapi()))
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -60,68 +148,6 @@ async def root():
         "health": "/system/health"
     }
 
-# Global exception handler
-@app.exception_handler(Exception)
-async def global_exception_handler(request, exc):
-    """Global exception handler"""
-    return JSONResponse(
-        status_code=500,
-        content={
-            "error": "Internal Server Error",
-            "message": str(exc),
-            "details": {
-                "path": str(request.url),
-                "method": request.method
-            }
-        }
-    )
-
-# Startup event
-@app.on_event("startup")
-async def startup_event():
-    """Startup event handler"""
-    print(f"Starting {API_TITLE} v{API_VERSION}")
-    print(f"API Documentation: http://localhost:8080/docs")
-    print(f"Alternative Docs: http://localhost:8080/redoc")
-    
-    # Create a sample document if documents directory is empty
-    if not os.listdir(DOCUMENTS_DIR):
-        sample_doc_path = os.path.join(DOCUMENTS_DIR, "sample_document.txt")
-        with open(sample_doc_path, 'w', encoding='utf-8') as f:
-            f.write("""Local RAG System Documentation
-
-This is a sample document for the Local RAG (Retrieval-Augmented Generation) system.
-
-The system uses:
-- Llama 3.2 1B model for text generation
-- all-MiniLM-L6-v2 for creating embeddings
-- FAISS for efficient vector similarity search
-- FastAPI for the REST API interface
-- Celery for asynchronous task processing
-
-Key Features:
-1. Local execution - no cloud dependencies
-2. Document processing and indexing
-3. Semantic search capabilities
-4. Response caching for improved performance
-5. Asynchronous task processing
-6. RESTful API interface
-
-To use the system:
-1. Place your documents in the data/documents/ directory
-2. Call the /documents/process endpoint to index them
-3. Use the /query endpoint to ask questions
-4. Monitor task progress using the task status endpoints
-
-The system is optimized for CPU-only execution and provides comprehensive API documentation through Swagger UI and ReDoc interfaces.""")
-        print(f"Created sample document: {sample_doc_path}")
-
-# Shutdown event
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Shutdown event handler"""
-    print(f"Shutting down {API_TITLE}")
-
 if __name__ == "__main__":
     import uvicorn
     
@@ -135,6 +161,12 @@ if __name__ == "__main__":
         "api.app:app",
         host=API_HOST,
         port=API_PORT,
-        reload=True,
-        log_level="info"
+        # uvloop has no Windows build; httptools parses HTTP in C
+        loop="uvloop" if sys.platform != "win32" else "asyncio",
+        http="httptools",
+        # Caches and the memory broker live in the process, so default to a single worker
+        workers=int(os.getenv("WORKERS", "1")),
+        reload=os.getenv("DEBUG", "").lower() in ("1", "true"),
+        access_log=False,
+        log_level="warning"
     )
\ No newline at end of file
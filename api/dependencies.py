@@ -0,0 +1,11 @@
+from fastapi import HTTPException, Request
+
+def get_rag_engine(request: Request):
+    """Get the shared RAG engine built in the application lifespan"""
+    engine = getattr(request.app.state, "rag_engine", None)
+    if engine is None:
+        error = getattr(request.app.state, "rag_engine_error", None) or "not initialized"
+        raise HTTPException(status_code=503, detail=f"RAG engine is not available: {error}")
+    # Pick up an index rebuilt by a Celery worker since the API loaded it
+    engine.retriever.faiss_storage.reload_if_changed()
+    return engine
@@ -0,0 +1,142 @@
+import orjson
+
+# Constant start of the JSON 500 body, filled in with the error type and request
+ERROR_BODY_PREFIX = b'{"error":"Internal Server Error","message":'
+
+class FastCORSMiddleware:
+    """Pure ASGI CORS middleware with precomputed header values"""
+
+    def __init__(self, app, allow_origin="*", allow_methods=("*",), allow_headers=("*",), allow_credentials=False, max_age=600):
+        self.app = app
+        # Join and encode the header values once instead of on every request
+        self._origin_header = allow_origin.encode("latin-1")
+        self._methods_header = ",".join(allow_methods).encode("latin-1")
+        self._headers_header = ",".join(allow_headers).encode("latin-1")
+        self._max_age_header = str(max_age).encode("latin-1")
+        # Browsers reject a literal "*" on credentialed requests, so echo the request values instead
+        self._echo_origin = allow_credentials and allow_origin == "*"
+        self._echo_methods = allow_credentials and "*" in allow_methods
+        self._echo_headers = allow_credentials and "*" in allow_headers
+        self._credentials_headers = (
+            ((b"access-control-allow-credentials", b"true"),) if allow_credentials else ()
+        )
+        self._cors_headers = (
+            (b"access-control-allow-origin", self._origin_header),
+            *self._credentials_headers,
+        )
+        self._preflight_headers = [
+            (b"access-control-allow-origin", self._origin_header),
+            (b"access-control-allow-methods", self._methods_header),
+            (b"access-control-allow-headers", self._headers_header),
+            *self._credentials_headers,
+            # Let browsers cache the preflight result instead of repeating it
+            (b"access-control-max-age", self._max_age_header),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin, request_method, request_headers = _cors_request_headers(scope["headers"])
+
+        if scope["method"] == "OPTIONS" and origin is not None and request_method is not None:
+            # Answer preflight requests without touching the router
+            await send({
+                "type": "http.response.start",
+                "status": 204,
+                "headers": self._preflight_response_headers(origin, request_method, request_headers)
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if self._echo_origin and origin is not None:
+            cors_headers = (
+                (b"access-control-allow-origin", origin),
+                (b"vary", b"Origin"),
+                *self._credentials_headers,
+            )
+        else:
+            cors_headers = self._cors_headers
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *cors_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _preflight_response_headers(self, origin, request_method, request_headers):
+        """Build the preflight headers, echoing request values where a wildcard is not allowed"""
+        if not (self._echo_origin or self._echo_methods or self._echo_headers):
+            return self._preflight_headers
+        headers = [
+            (b"access-control-allow-origin", origin if self._echo_origin else self._origin_header),
+            (b"access-control-allow-methods", request_method if self._echo_methods else self._methods_header),
+        ]
+        if not self._echo_headers:
+            headers.append((b"access-control-allow-headers", self._headers_header))
+        elif request_headers is not None:
+            headers.append((b"access-control-allow-headers", request_headers))
+        if self._echo_origin:
+            headers.append((b"vary", b"Origin"))
+        headers.extend(self._credentials_headers)
+        headers.append((b"access-control-max-age", self._max_age_header))
+        return headers
+
+class ExceptionMiddleware:
+    """Pure ASGI middleware turning unhandled errors into a JSON 500 response"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            if response_started:
+                raise
+            print(f"Unhandled error on {scope['method']} {scope['path']}: {exc}")
+            # Report only the exception type so internal messages are not leaked
+            body = b"".join((
+                ERROR_BODY_PREFIX,
+                orjson.dumps(type(exc).__name__),
+                b',"details":{"path":',
+                orjson.dumps(scope["path"]),
+                b',"method":',
+                orjson.dumps(scope["method"]),
+                b"}}",
+            ))
+            await send({
+                "type": "http.response.start",
+                "status": 500,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ]
+            })
+            await send({"type": "http.response.body", "body": body})
+
+def _cors_request_headers(headers):
+    """Pick the origin and preflight request headers out of the raw ASGI headers"""
+    origin = request_method = request_headers = None
+    for name, value in headers:
+        if name == b"origin":
+            origin = value
+        elif name == b"access-control-request-method":
+            request_method = value
+        elif name == b"access-control-request-headers":
+            request_headers = value
+    return origin, request_method, request_headers
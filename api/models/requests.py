@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
 
 class QueryRequest(BaseModel):
@@ -6,20 +6,25 @@ class QueryRequest(BaseModel):
     question: str = Field(..., description="The question to ask the RAG system", min_length=1, max_length=1000)
     async_processing: bool = Field(False, description="Whether to process the query asynchronously")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra="ignore",
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "question": "What is machine learning?",
                 "async_processing": False
             }
         }
+    )
 
 class BatchQueryRequest(BaseModel):
     """Request model for batch queries"""
     questions: List[str] = Field(..., description="List of questions to ask the RAG system", min_items=1, max_items=10)
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra="ignore",
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "questions": [
                     "What is machine learning?",
@@ -28,16 +33,20 @@ class BatchQueryRequest(BaseModel):
                 ]
             }
         }
+    )
 
 class DocumentProcessRequest(BaseModel):
     """Request model for document processing"""
     clear_existing: bool = Field(True, description="Whether to clear existing index before processing")
     async_processing: bool = Field(True, description="Whether to process documents asynchronously")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra="ignore",
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "clear_existing": True,
                 "async_processing": True
             }
-        }
\ No newline at end of file
+        }
+    )
\ No newline at end of file
@@ -1,7 +1,10 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any, Union
 from enum import Enum
 
+# Response models only describe data the server already produced
+RESPONSE_MODEL_CONFIG = ConfigDict(extra="ignore", frozen=True)
+
 class TaskStatus(str, Enum):
     """Task status enumeration"""
     PENDING = "PENDING"
@@ -12,6 +15,8 @@ class TaskStatus(str, Enum):
 
 class QueryResponse(BaseModel):
     """Response model for single query"""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     answer: str = Field(..., description="The generated answer")
     source: str = Field(..., description="Source of the answer (cache/generated)")
     processing_time: float = Field(..., description="Time taken to process the query in seconds")
@@ -20,12 +25,16 @@ class QueryResponse(BaseModel):
     
 class AsyncTaskResponse(BaseModel):
     """Response model for async task submission"""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     task_id: str = Field(..., description="Unique task identifier")
     status: str = Field(..., description="Current task status")
     message: str = Field(..., description="Status message")
     
 class TaskStatusResponse(BaseModel):
     """Response model for task status check"""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     task_id: str = Field(..., description="Task identifier")
     status: TaskStatus = Field(..., description="Current task status")
     progress: Optional[int] = Field(None, description="Task progress percentage (0-100)")
@@ -35,6 +44,8 @@ class TaskStatusResponse(BaseModel):
 
 class DocumentStats(BaseModel):
     """Document statistics model"""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     total_documents: int = Field(..., description="Total number of documents")
     total_characters: int = Field(..., description="Total characters across all documents")
     estimated_chunks: int = Field(..., description="Estimated number of chunks")
@@ -43,12 +54,16 @@ class DocumentStats(BaseModel):
 
 class IndexStats(BaseModel):
     """Index statistics model"""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     total_vectors: int = Field(..., description="Total vectors in the index")
     embedding_dimension: int = Field(..., description="Embedding vector dimension")
     top_k_results: int = Field(..., description="Top-K results configuration")
 
 class CacheStats(BaseModel):
     """Cache statistics model"""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     total_items: int = Field(..., description="Total cached items")
     total_size_bytes: int = Field(..., description="Total cache size in bytes")
     max_size: int = Field(..., description="Maximum cache size")
@@ -56,6 +71,8 @@ class CacheStats(BaseModel):
 
 class SystemStats(BaseModel):
     """System statistics model"""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     documents: DocumentStats
     index: IndexStats
     cache: CacheStats
@@ -63,6 +80,8 @@ class SystemStats(BaseModel):
 
 class HealthResponse(BaseModel):
     """Health check response model"""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     status: str = Field(..., description="System health status")
     timestamp: str = Field(..., description="Health check timestamp")
     version: str = Field(..., description="API version")
@@ -70,6 +89,8 @@ class HealthResponse(BaseModel):
 
 class DocumentProcessResponse(BaseModel):
     """Document processing response model"""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     status: str = Field(..., description="Processing status")
     documents_processed: int = Field(..., description="Number of documents processed")
     message: str = Field(..., description="Processing message")
@@ -77,12 +98,16 @@ class DocumentProcessResponse(BaseModel):
 
 class BatchQueryResponse(BaseModel):
     """Batch query response model"""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     total_questions: int = Field(..., description="Total number of questions processed")
     results: List[Dict[str, Any]] = Field(..., description="Results for each question")
     task_id: Optional[str] = Field(None, description="Task ID if processed asynchronously")
 
 class ErrorResponse(BaseModel):
     """Error response model"""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     error: str = Field(..., description="Error type")
     message: str = Field(..., description="Error message")
     details: Optional[Dict[str, Any]] = Field(None, description="Additional error details")
\ No newline at end of file
@@ -0,0 +1,26 @@
+from decimal import Decimal
+from fastapi.responses import ORJSONResponse as _BaseORJSONResponse
+from pydantic import BaseModel
+import orjson
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def orjson_default(obj):
+    """Serialize types orjson does not handle natively"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(content):
+    """Serialize content to JSON bytes with orjson"""
+    return orjson.dumps(content, default=orjson_default, option=ORJSON_OPTIONS)
+
+class ORJSONResponse(_BaseORJSONResponse):
+    """orjson response that also accepts pre-serialized JSON bytes"""
+
+    def render(self, content):
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
@@ -0,0 +1,101 @@
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from api.responses import ORJSONResponse, dumps
+from tasks.celery_app import celery_app
+import asyncio
+import time
+
+# Serialized task status bodies, keyed by task id: (state, body, cached_at)
+_task_status_cache = {}
+TASK_STATUS_CACHE_TTL = 0.5  # seconds, for states that can still change
+TASK_STATUS_TERMINAL_TTL = 60  # seconds, results of finished tasks are immutable
+TASK_STATUS_CACHE_MAX_SIZE = 1000
+TERMINAL_STATES = ('SUCCESS', 'FAILURE')
+MAX_TASK_WAIT = 30  # seconds a status request may block waiting for completion
+TASK_WAIT_INITIAL_INTERVAL = 0.1  # seconds before the first state check while waiting
+TASK_WAIT_MAX_INTERVAL = 2.0  # seconds between state checks once the interval has grown
+
+# Everything after the task_id for a pending task, serialized once at import
+PENDING_BODY_TAIL = dumps({
+    'status': 'PENDING',
+    'progress': None,
+    'message': "Task is waiting to be processed",
+    'result': None,
+    'error': None
+})[1:]
+
+async def task_status_response(task_id, wait=0):
+    """Build the JSON status response for a Celery task"""
+    try:
+        now = time.monotonic()
+        cached = _task_status_cache.get(task_id)
+
+        # Finished tasks never change, so serve them without asking the backend
+        if cached is not None and cached[0] in TERMINAL_STATES and now - cached[2] < TASK_STATUS_TERMINAL_TTL:
+            return ORJSONResponse(cached[1])
+
+        # Get task result; every read may be a round trip to the result backend, so none runs on the event loop
+        task_result = celery_app.AsyncResult(task_id)
+        state = await run_in_threadpool(lambda: task_result.state)
+
+        if wait and state not in TERMINAL_STATES:
+            # Sleep on the event loop between checks, doubling the interval, so waiting requests
+            # neither hold a worker thread nor query the backend several times a second
+            deadline = now + wait
+            delay = TASK_WAIT_INITIAL_INTERVAL
+            while state not in TERMINAL_STATES:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(delay * 2, TASK_WAIT_MAX_INTERVAL)
+                state = await run_in_threadpool(lambda: task_result.state)
+            now = time.monotonic()
+
+        if cached is not None and cached[0] == state and now - cached[2] < TASK_STATUS_CACHE_TTL:
+            return ORJSONResponse(cached[1])
+
+        content = await run_in_threadpool(_build_task_status_body, task_id, state, task_result)
+        _cache_task_status(task_id, state, content, now)
+        return ORJSONResponse(content)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting task status: {str(e)}")
+
+def _build_task_status_body(task_id, state, task_result):
+    """Serialize the status of a task in the given state"""
+    if state == 'PENDING':
+        return b'{"task_id":' + dumps(task_id) + b',' + PENDING_BODY_TAIL
+
+    response = {
+        'task_id': task_id,
+        'status': state,
+        'progress': None,
+        'message': None,
+        'result': None,
+        'error': None
+    }
+
+    if state == 'PROGRESS':
+        response['progress'] = task_result.info.get('progress', 0)
+        response['message'] = task_result.info.get('status', 'Processing...')
+    elif state == 'SUCCESS':
+        result = task_result.result
+        response['progress'] = 100
+        response['message'] = result.get('message', 'Task completed successfully')
+        response['result'] = result
+    elif state == 'FAILURE':
+        response['progress'] = 0
+        response['message'] = "Task failed"
+        response['error'] = str(task_result.info)
+    else:
+        response['message'] = f"Task is in {state} state"
+
+    return dumps(response)
+
+def _cache_task_status(task_id, state, content, cached_at):
+    """Store a serialized task status, evicting the oldest entry when full"""
+    _task_status_cache.pop(task_id, None)
+    if len(_task_status_cache) >= TASK_STATUS_CACHE_MAX_SIZE:
+        del _task_status_cache[next(iter(_task_status_cache))]
+    _task_status_cache[task_id] = (state, content, cached_at)
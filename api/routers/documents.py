@@ -1,25 +1,18 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from api.dependencies import get_rag_engine
 from api.models.requests import DocumentProcessRequest
 from api.models.responses import DocumentProcessResponse, AsyncTaskResponse, TaskStatusResponse, SystemStats
-from tasks.document_tasks import process_documents_async, clear_index_async, get_document_stats_async
-from tasks.celery_app import celery_app
-from rag.engine import RAGEngine
+from api.responses import ORJSONResponse
+from api.routers._task_status import task_status_response, MAX_TASK_WAIT
+from api.routers.query import clear_response_cache
+from tasks.celery_app import index_write_lock
 from typing import Union
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
 
-# Initialize RAG engine
-rag_engine = None
-
-def get_rag_engine():
-    """Get or initialize RAG engine"""
-    global rag_engine
-    if rag_engine is None:
-        rag_engine = RAGEngine()
-    return rag_engine
-
-@router.post("/process", response_model=Union[DocumentProcessResponse, AsyncTaskResponse])
-async def process_documents(request: DocumentProcessRequest):
+@router.post("/process", response_model=None, responses={200: {"model": Union[DocumentProcessResponse, AsyncTaskResponse]}})
+async def process_documents(request: DocumentProcessRequest, raw_request: Request):
     """
     Process documents from the data/documents/ directory.
     
@@ -27,54 +20,56 @@ async def process_documents(request: DocumentProcessRequest):
     - **async_processing**: Whether to process documents asynchronously
     """
     try:
+        # Cached answers were built from the documents about to be replaced
+        clear_response_cache()
+        
         if request.async_processing:
             # Process asynchronously
+            from tasks.document_tasks import process_documents_async, clear_index_async
+            # Submitted from a worker thread: with the memory broker the task runs inline in .delay()
             if request.clear_existing:
-                # First clear the index, then process documents
-                clear_task = clear_index_async.delay()
-                # Wait a moment then start processing
-                task = process_documents_async.delay()
+                # Chained, so processing only starts once the index has been cleared
+                task = await run_in_threadpool((clear_index_async.si() | process_documents_async.si()).delay)
             else:
-                task = process_documents_async.delay()
+                task = await run_in_threadpool(process_documents_async.delay)
                 
-            return AsyncTaskResponse(
-                task_id=task.id,
-                status="PENDING",
-                message="Document processing submitted for asynchronous execution"
-            )
+            return ORJSONResponse({
+                'task_id': task.id,
+                'status': "PENDING",
+                'message': "Document processing submitted for asynchronous execution"
+            })
         else:
-            # Process synchronously
-            engine = get_rag_engine()
-            
-            if request.clear_existing:
-                engine.retriever.clear_index()
-                
-            result = engine.process_documents()
+            # Process synchronously, off the event loop so other requests are served meanwhile
+            engine = get_rag_engine(raw_request)
+            result = await run_in_threadpool(_process_documents, engine, request.clear_existing)
             
-            return DocumentProcessResponse(
-                status=result['status'],
-                documents_processed=result['documents_processed'],
-                message=result['message']
-            )
+            return ORJSONResponse({
+                'status': result['status'],
+                'documents_processed': result['documents_processed'],
+                'message': result['message'],
+                'task_id': None
+            })
             
+    except HTTPException:
+        # e.g. 503 from get_rag_engine while the engine is unavailable
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing documents: {str(e)}")
 
-@router.get("/status", response_model=SystemStats)
-async def get_document_status():
+@router.get("/status", response_model=None, responses={200: {"model": SystemStats}})
+async def get_document_status(engine=Depends(get_rag_engine)):
     """
     Get current document processing status and statistics.
     """
     try:
-        engine = get_rag_engine()
         stats = engine.get_system_stats()
         
-        return SystemStats(
-            documents=stats['documents'],
-            index=stats['index'],
-            cache=stats['cache'],
-            system_status=stats['system_status']
-        )
+        return ORJSONResponse({
+            'documents': stats['documents'],
+            'index': stats['index'],
+            'cache': stats['cache'],
+            'system_status': stats['system_status']
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting document status: {str(e)}")
@@ -85,9 +80,11 @@ async def clear_search_index():
     Clear the search index (removes all indexed documents).
     """
     try:
-        task = clear_index_async.delay()
+        from tasks.document_tasks import clear_index_async
+        task = await run_in_threadpool(clear_index_async.delay)
+        clear_response_cache()
         
-        return AsyncTaskResponse(
+        return AsyncTaskResponse.model_construct(
             task_id=task.id,
             status="PENDING",
             message="Index clearing submitted for asynchronous execution"
@@ -96,74 +93,37 @@ async def clear_search_index():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error clearing index: {str(e)}")
 
-@router.get("/stats", response_model=SystemStats)
-async def get_document_stats():
+@router.get("/stats", response_model=None, responses={200: {"model": SystemStats}})
+async def get_document_stats(engine=Depends(get_rag_engine)):
     """
     Get detailed document and system statistics.
     """
     try:
-        engine = get_rag_engine()
         stats = engine.get_system_stats()
         
-        return SystemStats(
-            documents=stats['documents'],
-            index=stats['index'],
-            cache=stats['cache'],
-            system_status=stats['system_status']
-        )
+        return ORJSONResponse({
+            'documents': stats['documents'],
+            'index': stats['index'],
+            'cache': stats['cache'],
+            'system_status': stats['system_status']
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting document statistics: {str(e)}")
 
-@router.get("/task/{task_id}", response_model=TaskStatusResponse)
-async def get_document_task_status(task_id: str):
+@router.get("/task/{task_id}", response_model=None, responses={200: {"model": TaskStatusResponse}})
+async def get_document_task_status(task_id: str, wait: float = Query(0, ge=0, le=MAX_TASK_WAIT, description="Seconds to wait for the task to finish before answering")):
     """
     Get the status of a document processing task.
     
     - **task_id**: The task identifier returned when submitting an async document operation
+    - **wait**: Optionally block up to this many seconds until the task finishes
     """
-    try:
-        # Get task result
-        task_result = celery_app.AsyncResult(task_id)
-        
-        if task_result.state == 'PENDING':
-            response = TaskStatusResponse(
-                task_id=task_id,
-                status="PENDING",
-                message="Task is waiting to be processed"
-            )
-        elif task_result.state == 'PROGRESS':
-            response = TaskStatusResponse(
-                task_id=task_id,
-                status="PROGRESS",
-                progress=task_result.info.get('progress', 0),
-                message=task_result.info.get('status', 'Processing...')
-            )
-        elif task_result.state == 'SUCCESS':
-            result = task_result.result
-            response = TaskStatusResponse(
-                task_id=task_id,
-                status="SUCCESS",
-                progress=100,
-                message=result.get('message', 'Task completed successfully'),
-                result=result
-            )
-        elif task_result.state == 'FAILURE':
-            response = TaskStatusResponse(
-                task_id=task_id,
-                status="FAILURE",
-                progress=0,
-                message="Task failed",
-                error=str(task_result.info)
-            )
-        else:
-            response = TaskStatusResponse(
-                task_id=task_id,
-                status=task_result.state,
-                message=f"Task is in {task_result.state} state"
-            )
-            
-        return response
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting task status: {str(e)}")
\ No newline at end of file
+    return await task_status_response(task_id, wait)
+
+def _process_documents(engine, clear_existing):
+    """Rebuild the index, holding the lock shared with the Celery workers"""
+    with index_write_lock():
+        if clear_existing:
+            engine.retriever.clear_index()
+        return engine.process_documents()
\ No newline at end of file
@@ -1,26 +1,38 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Query, BackgroundTasks, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from api.dependencies import get_rag_engine
 from api.models.requests import QueryRequest, BatchQueryRequest
 from api.models.responses import QueryResponse, AsyncTaskResponse, TaskStatusResponse, BatchQueryResponse
-from tasks.query_tasks import process_query_async, batch_query_async
+from api.responses import ORJSONResponse
+from api.routers._task_status import task_status_response, MAX_TASK_WAIT
 from tasks.celery_app import celery_app
-from rag.engine import RAGEngine
+from celery import states
+from celery.utils import uuid
 from typing import Union
+import asyncio
+import base64
+import hashlib
+import os
 import time
 
-router = APIRouter(prefix="/query", tags=["Query"])
+# Try to import settings, use fallback if not available
+try:
+    from config.settings import TASK_TIMEOUT
+except ImportError:
+    TASK_TIMEOUT = 300  # 5 minutes
 
-# Initialize RAG engine (will be reused across requests)
-rag_engine = None
+router = APIRouter(prefix="/query", tags=["Query"])
 
-def get_rag_engine():
-    """Get or initialize RAG engine"""
-    global rag_engine
-    if rag_engine is None:
-        rag_engine = RAGEngine()
-    return rag_engine
+# Answers to synchronous queries, keyed by normalized question: (answer, cached_at, index_mtime)
+_response_cache = {}
+RESPONSE_CACHE_TTL = 3600  # seconds
+RESPONSE_CACHE_MAX_SIZE = 500
+BATCH_RESULTS_POLL_INTERVAL = 0.2  # seconds between checks for new answers of a running batch
+BATCH_RESULTS_PENDING_GRACE = 5  # seconds a results file may exist while its task reports PENDING
 
-@router.post("/", response_model=Union[QueryResponse, AsyncTaskResponse])
-async def process_query(request: QueryRequest):
+@router.post("/", response_model=None, responses={200: {"model": Union[QueryResponse, AsyncTaskResponse]}})
+async def process_query(request: QueryRequest, raw_request: Request):
     """
     Process a single query through the RAG system.
     
@@ -30,100 +42,150 @@ async def process_query(request: QueryRequest):
     try:
         if request.async_processing:
             # Process asynchronously
-            task = process_query_async.delay(request.question)
-            return AsyncTaskResponse(
-                task_id=task.id,
-                status="PENDING",
-                message="Query submitted for asynchronous processing"
-            )
+            from tasks.query_tasks import process_query_async
+            # Submitted from a worker thread: with the memory broker the task runs inline in .delay()
+            task = await run_in_threadpool(process_query_async.delay, request.question)
+            return ORJSONResponse({
+                'task_id': task.id,
+                'status': "PENDING",
+                'message': "Query submitted for asynchronous processing"
+            })
         else:
-            # Process synchronously
-            engine = get_rag_engine()
-            result = engine.query(request.question)
+            start_time = time.time()
+            engine = get_rag_engine(raw_request)
             
-            return QueryResponse(
-                answer=result['answer'],
-                source=result['source'],
-                processing_time=result['processing_time'],
-                retrieved_chunks=result['retrieved_chunks'],
-                context_used=result['context_used']
-            )
+            # Serve repeated questions without running the engine, unless the index was rebuilt since
+            key = hashlib.sha256(request.question.strip().lower().encode()).digest()
+            index_mtime = engine.retriever.faiss_storage.index_mtime
+            cached = _response_cache.get(key)
+            if cached is not None and cached[2] == index_mtime and start_time - cached[1] < RESPONSE_CACHE_TTL:
+                return ORJSONResponse({
+                    'answer': cached[0],
+                    'source': 'cache',
+                    'processing_time': time.time() - start_time,
+                    'retrieved_chunks': 0,
+                    'context_used': False
+                })
+
+            # Process synchronously, off the event loop so other requests are served meanwhile;
+            # the engine also answers paraphrases of earlier questions from its cache
+            result = await run_in_threadpool(engine.query, request.question)
+            _cache_response(key, result['answer'], index_mtime)
             
+            return ORJSONResponse({
+                'answer': result['answer'],
+                'source': result['source'],
+                'processing_time': result['processing_time'],
+                'retrieved_chunks': result['retrieved_chunks'],
+                'context_used': result['context_used']
+            })
+            
+    except HTTPException:
+        # e.g. 503 from get_rag_engine while the engine is unavailable
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
-@router.post("/batch", response_model=Union[BatchQueryResponse, AsyncTaskResponse])
-async def process_batch_queries(request: BatchQueryRequest):
+@router.post("/batch", response_model=None, responses={200: {"model": Union[BatchQueryResponse, AsyncTaskResponse]}})
+async def process_batch_queries(request: BatchQueryRequest, raw_request: Request):
     """
     Process multiple queries in batch.
     
     - **questions**: List of questions to process (max 10)
     """
     try:
+        # Embed all questions in one call here so the worker can skip re-embedding;
+        # without a loaded engine the worker embeds them itself
+        embeddings = None
+        engine = getattr(raw_request.app.state, "rag_engine", None)
+        if engine is not None:
+            vectors = await run_in_threadpool(engine.retriever.embed_query, request.questions)
+            embeddings = base64.b64encode(vectors.tobytes()).decode('ascii')
+        
         # Always process batch queries asynchronously
-        task = batch_query_async.delay(request.questions)
+        from tasks.query_tasks import batch_query_async, batch_results_path
+        # Create the results file before queueing, so the stream endpoint can tell a queued batch from an unknown id
+        task_id = uuid()
+        batch_results_path(task_id).touch()
+        task = await run_in_threadpool(batch_query_async.apply_async, (request.questions, embeddings), task_id=task_id)
         
-        return AsyncTaskResponse(
-            task_id=task.id,
-            status="PENDING",
-            message=f"Batch of {len(request.questions)} queries submitted for processing"
-        )
+        return ORJSONResponse({
+            'task_id': task.id,
+            'status': "PENDING",
+            'message': f"Batch of {len(request.questions)} queries submitted for processing"
+        })
         
+    except HTTPException:
+        # e.g. 503 from get_rag_engine while the engine is unavailable
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing batch queries: {str(e)}")
 
-@router.get("/{task_id}", response_model=TaskStatusResponse)
-async def get_task_status(task_id: str):
+@router.get("/{task_id}", response_model=None, responses={200: {"model": TaskStatusResponse}})
+async def get_task_status(task_id: str, wait: float = Query(0, ge=0, le=MAX_TASK_WAIT, description="Seconds to wait for the task to finish before answering")):
     """
     Get the status of an asynchronous task.
     
     - **task_id**: The task identifier returned when submitting an async query
+    - **wait**: Optionally block up to this many seconds until the task finishes
+    """
+    return await task_status_response(task_id, wait)
+
+@router.get("/{task_id}/results")
+async def stream_batch_results(task_id: str):
+    """
+    Stream the answers of a batch query task as JSON Lines.
+    
+    Answers are sent as soon as they are generated; the response ends when the task finishes.
+    
+    - **task_id**: The task identifier returned when submitting a batch query
     """
+    from tasks.query_tasks import batch_results_path
+    if os.path.basename(task_id) != task_id:
+        raise HTTPException(status_code=404, detail=f"No batch results for task {task_id}")
+    
+    # The file is created when the batch is submitted, so a missing one means an unknown or expired task
+    results_path = batch_results_path(task_id)
+    if not results_path.is_file():
+        raise HTTPException(status_code=404, detail=f"No batch results for task {task_id}")
+    
+    task_result = celery_app.AsyncResult(task_id)
+    return StreamingResponse(_follow_batch_results(task_result, results_path), media_type="application/x-ndjson")
+
+async def _follow_batch_results(task_result, results_path):
+    """Yield complete result lines from the file until the task has finished"""
+    # No task outlives its time limit, so neither does the stream
+    deadline = time.monotonic() + TASK_TIMEOUT
+    pending_since = None
+    pending = b''
     try:
-        # Get task result
-        task_result = celery_app.AsyncResult(task_id)
-        
-        if task_result.state == 'PENDING':
-            response = TaskStatusResponse(
-                task_id=task_id,
-                status="PENDING",
-                message="Task is waiting to be processed"
-            )
-        elif task_result.state == 'PROGRESS':
-            response = TaskStatusResponse(
-                task_id=task_id,
-                status="PROGRESS",
-                progress=task_result.info.get('progress', 0),
-                message=task_result.info.get('status', 'Processing...')
-            )
-        elif task_result.state == 'SUCCESS':
-            result = task_result.result
-            response = TaskStatusResponse(
-                task_id=task_id,
-                status="SUCCESS",
-                progress=100,
-                message=result.get('message', 'Task completed successfully'),
-                result=result
-            )
-        elif task_result.state == 'FAILURE':
-            response = TaskStatusResponse(
-                task_id=task_id,
-                status="FAILURE",
-                progress=0,
-                message="Task failed",
-                error=str(task_result.info)
-            )
-        else:
-            response = TaskStatusResponse(
-                task_id=task_id,
-                status=task_result.state,
-                message=f"Task is in {task_result.state} state"
-            )
+        results_file = open(results_path, 'rb')
+    except FileNotFoundError:
+        # Removed as expired since the request checked for it
+        return
+    with results_file:
+        while True:
+            # Check the state before reading so nothing written before completion is missed
+            state = await run_in_threadpool(lambda: task_result.state)
+            finished = state in states.READY_STATES
+            now = time.monotonic()
             
-        return response
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting task status: {str(e)}")
+            pending += results_file.read()
+            complete, newline, pending = pending.rpartition(b'\n')
+            if newline:
+                yield complete + newline
+            # An empty file belongs to a batch still in the queue; a task with results that still
+            # reports PENDING is unknown to the backend, e.g. lost in a restart, and will never finish
+            if state == states.PENDING and results_file.tell():
+                pending_since = pending_since or now
+            else:
+                pending_since = None
+            
+            if finished or now > deadline:
+                return
+            if pending_since is not None and now - pending_since > BATCH_RESULTS_PENDING_GRACE:
+                return
+            await asyncio.sleep(BATCH_RESULTS_POLL_INTERVAL)
 
 @router.delete("/{task_id}")
 async def cancel_task(task_id: str):
@@ -137,4 +199,15 @@ async def cancel_task(task_id: str):
         return {"message": f"Task {task_id} has been cancelled"}
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error cancelling task: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error cancelling task: {str(e)}")
+
+def _cache_response(key, answer, index_mtime):
+    """Store the answer to a query, evicting the oldest entry when full"""
+    _response_cache.pop(key, None)
+    if len(_response_cache) >= RESPONSE_CACHE_MAX_SIZE:
+        del _response_cache[next(iter(_response_cache))]
+    _response_cache[key] = (answer, time.time(), index_mtime)
+
+def clear_response_cache():
+    """Drop the cached answers, e.g. after the documents behind them changed"""
+    _response_cache.clear()
@@ -1,82 +1,133 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, Request
+from api.dependencies import get_rag_engine
 from api.models.responses import HealthResponse, SystemStats
-from rag.engine import RAGEngine
+from api.responses import ORJSONResponse, dumps
 from datetime import datetime
+from pathlib import Path
 import sys
 import os
+import time
 
 # Try to import settings, use fallback if not available
 try:
-    from config.settings import API_VERSION, API_TITLE
+    from config.settings import (
+        API_TITLE, API_VERSION, API_DESCRIPTION,
+        LLM_MODEL_ID, EMBEDDING_MODEL_ID,
+        CHUNK_SIZE, CHUNK_OVERLAP, TOP_K_RESULTS,
+        CACHE_TTL, CACHE_MAX_SIZE
+    )
+    from config.settings import DATA_DIR, DOCUMENTS_DIR, CACHE_DIR, EMBEDDINGS_DIR
 except ImportError:
-    API_VERSION = "1.0.0"
+    # Fallback values
     API_TITLE = "Local RAG API"
+    API_VERSION = "1.0.0"
+    API_DESCRIPTION = "Local RAG API with Celery job queues"
+    LLM_MODEL_ID = "meta-llama/Llama-3.2-1B"
+    EMBEDDING_MODEL_ID = "all-MiniLM-L6-v2"
+    CHUNK_SIZE = 500
+    CHUNK_OVERLAP = 50
+    TOP_K_RESULTS = 5
+    CACHE_TTL = 24 * 60 * 60
+    CACHE_MAX_SIZE = 1000
+    
+    PROJECT_ROOT = Path(__file__).parent.parent.parent
+    DATA_DIR = PROJECT_ROOT / "data"
+    DOCUMENTS_DIR = DATA_DIR / "documents"
+    CACHE_DIR = DATA_DIR / "cache"
+    EMBEDDINGS_DIR = PROJECT_ROOT / "embeddings"
+
+PYTHON_VERSION = f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"
+
+# /system/info only reports settings, so serialize it once at import
+SYSTEM_INFO_BYTES = dumps({
+    "api": {
+        "title": API_TITLE,
+        "version": API_VERSION,
+        "description": API_DESCRIPTION
+    },
+    "models": {
+        "llm_model": LLM_MODEL_ID,
+        "embedding_model": EMBEDDING_MODEL_ID
+    },
+    "configuration": {
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "top_k_results": TOP_K_RESULTS,
+        "cache_ttl_hours": CACHE_TTL / 3600,
+        "cache_max_size": CACHE_MAX_SIZE
+    },
+    "system": {
+        "python_version": PYTHON_VERSION,
+        "platform": sys.platform
+    }
+})
+
+# Last serialized health check: [checked_at, body]
+_health_cache = [0.0, b""]
+HEALTH_CACHE_TTL = 1.0  # seconds
 
 router = APIRouter(prefix="/system", tags=["System"])
 
-@router.get("/health", response_model=HealthResponse)
-async def health_check():
+@router.get("/health", response_model=None, responses={200: {"model": HealthResponse}})
+async def health_check(request: Request):
     """
     Get system health status.
     """
     try:
+        # Load balancers probe this often; answer from the last check while it is fresh
+        now = time.monotonic()
+        if now - _health_cache[0] < HEALTH_CACHE_TTL:
+            return ORJSONResponse(_health_cache[1])
+        
         # Check various system components
         components = {}
         
-        # Check if we can initialize RAG engine
-        try:
-            rag_engine = RAGEngine()
+        # Check the shared RAG engine built at startup
+        if getattr(request.app.state, "rag_engine", None) is not None:
             components["rag_engine"] = "healthy"
-        except Exception as e:
-            components["rag_engine"] = f"error: {str(e)}"
+        else:
+            error = getattr(request.app.state, "rag_engine_error", None) or "not initialized"
+            components["rag_engine"] = f"error: {error}"
         
         # Check if directories exist
-        try:
-            from config.settings import DATA_DIR, DOCUMENTS_DIR, CACHE_DIR, EMBEDDINGS_DIR
-        except ImportError:
-            from pathlib import Path
-            PROJECT_ROOT = Path(__file__).parent.parent.parent
-            DATA_DIR = PROJECT_ROOT / "data"
-            DOCUMENTS_DIR = DATA_DIR / "documents"
-            CACHE_DIR = DATA_DIR / "cache"
-            EMBEDDINGS_DIR = PROJECT_ROOT / "embeddings"
-        
         components["data_directory"] = "healthy" if os.path.exists(DATA_DIR) else "missing"
         components["documents_directory"] = "healthy" if os.path.exists(DOCUMENTS_DIR) else "missing"
         components["cache_directory"] = "healthy" if os.path.exists(CACHE_DIR) else "missing"
         components["embeddings_directory"] = "healthy" if os.path.exists(EMBEDDINGS_DIR) else "missing"
         
         # Check Python version
-        components["python_version"] = f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"
+        components["python_version"] = PYTHON_VERSION
         
         # Overall status
         overall_status = "healthy" if all("error" not in status for status in components.values()) else "degraded"
         
-        return HealthResponse(
-            status=overall_status,
-            timestamp=datetime.utcnow().isoformat(),
-            version=API_VERSION,
-            components=components
-        )
+        content = dumps({
+            'status': overall_status,
+            'timestamp': datetime.utcnow().isoformat(),
+            'version': API_VERSION,
+            'components': components
+        })
+        _health_cache[0] = now
+        _health_cache[1] = content
+        return ORJSONResponse(content)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error checking system health: {str(e)}")
 
-@router.get("/stats", response_model=SystemStats)
-async def get_system_stats():
+@router.get("/stats", response_model=None, responses={200: {"model": SystemStats}})
+async def get_system_stats(rag_engine=Depends(get_rag_engine)):
     """
     Get comprehensive system statistics.
     """
     try:
-        rag_engine = RAGEngine()
         stats = rag_engine.get_system_stats()
         
-        return SystemStats(
-            documents=stats['documents'],
-            index=stats['index'],
-            cache=stats['cache'],
-            system_status=stats['system_status']
-        )
+        return ORJSONResponse({
+            'documents': stats['documents'],
+            'index': stats['index'],
+            'cache': stats['cache'],
+            'system_status': stats['system_status']
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting system statistics: {str(e)}")
@@ -86,79 +137,34 @@ async def get_system_info():
     """
     Get general system information.
     """
-    try:
-        try:
-            from config.settings import (
-                API_TITLE, API_VERSION, API_DESCRIPTION,
-                LLM_MODEL_ID, EMBEDDING_MODEL_ID,
-                CHUNK_SIZE, CHUNK_OVERLAP, TOP_K_RESULTS,
-                CACHE_TTL, CACHE_MAX_SIZE
-            )
-        except ImportError:
-            # Fallback values
-            API_TITLE = "Local RAG API"
-            API_VERSION = "1.0.0"
-            API_DESCRIPTION = "Local RAG API with Celery job queues"
-            LLM_MODEL_ID = "meta-llama/Llama-3.2-1B"
-            EMBEDDING_MODEL_ID = "all-MiniLM-L6-v2"
-            CHUNK_SIZE = 500
-            CHUNK_OVERLAP = 50
-            TOP_K_RESULTS = 5
-            CACHE_TTL = 24 * 60 * 60
-            CACHE_MAX_SIZE = 1000
-        
-        return {
-            "api": {
-                "title": API_TITLE,
-                "version": API_VERSION,
-                "description": API_DESCRIPTION
-            },
-            "models": {
-                "llm_model": LLM_MODEL_ID,
-                "embedding_model": EMBEDDING_MODEL_ID
-            },
-            "configuration": {
-                "chunk_size": CHUNK_SIZE,
-                "chunk_overlap": CHUNK_OVERLAP,
-                "top_k_results": TOP_K_RESULTS,
-                "cache_ttl_hours": CACHE_TTL / 3600,
-                "cache_max_size": CACHE_MAX_SIZE
-            },
-            "system": {
-                "python_version": f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
-                "platform": sys.platform
-            }
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting system info: {str(e)}")
+    return ORJSONResponse(SYSTEM_INFO_BYTES)
 
 @router.post("/cache/clear")
-async def clear_cache():
+async def clear_cache(request: Request):
     """
     Clear the response cache.
     """
     try:
-        from cache.manager import CacheManager
-        cache_manager = CacheManager()
-        
-        # Get current stats
-        stats_before = cache_manager.get_cache_stats()
+        # Prefer the engine's manager so its in-memory similarity index is cleared too
+        engine = getattr(request.app.state, "rag_engine", None)
+        if engine is not None:
+            cache_manager = engine.cache_manager
+        else:
+            from cache.manager import CacheManager
+            cache_manager = CacheManager()
         
-        # Clear cache by removing all cache files
-        import os
-        cache_files = [f for f in os.listdir(cache_manager.cache_dir) if f.endswith('.pkl')]
-        for cache_file in cache_files:
-            os.remove(os.path.join(cache_manager.cache_dir, cache_file))
+        # Remove all cache files in a single directory pass
+        items_removed, bytes_freed = cache_manager.clear_cache()
         
-        # Get stats after clearing
-        stats_after = cache_manager.get_cache_stats()
+        # Drop the in-process answers served by the query router as well
+        from api.routers.query import clear_response_cache
+        clear_response_cache()
         
         return {
             "message": "Cache cleared successfully",
-            "items_removed": stats_before['total_items'],
-            "bytes_freed": stats_before['total_size_bytes'],
-            "current_items": stats_after['total_items']
+            "items_removed": items_removed,
+            "bytes_freed": bytes_freed,
+            "current_items": 0
         }
         
     except Exception as e:
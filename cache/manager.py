@@ -1,106 +1,185 @@
-import json
+import lmdb
 import os
+import threading
 import time
 import hashlib
 import pickle
 from pathlib import Path
+from cache.semantic import SemanticCache
 
 # Try to import settings, use fallback if not available
 try:
-    from config.settings import CACHE_DIR, CACHE_TTL, CACHE_MAX_SIZE
+    from config.settings import CACHE_DIR, CACHE_TTL, CACHE_MAX_SIZE, CACHE_MAP_SIZE
 except ImportError:
     # Fallback configuration
     PROJECT_ROOT = Path(__file__).parent.parent
     CACHE_DIR = PROJECT_ROOT / "data" / "cache"
     CACHE_TTL = 24 * 60 * 60  # 24 hours
     CACHE_MAX_SIZE = 1000
+    CACHE_MAP_SIZE = 1 << 30  # upper bound on the LMDB store size in bytes
+
+# LMDB environments keyed by (directory, pid); one may only be opened once per process
+_environments = {}
+
+def _open_environment(path):
+    """Open the LMDB store in a directory, reusing this process's handle"""
+    key = (str(path), os.getpid())
+    env = _environments.get(key)
+    if env is None:
+        env = lmdb.open(str(path), map_size=CACHE_MAP_SIZE, readahead=False)
+        _environments[key] = env
+    return env
+
+def _stored_bytes(stat):
+    """Size of the LMDB pages holding cache entries"""
+    return stat['psize'] * (stat['branch_pages'] + stat['leaf_pages'] + stat['overflow_pages'])
 
 class CacheManager:
     def __init__(self):
         """Initialize cache manager"""
         self.cache_dir = CACHE_DIR
         os.makedirs(self.cache_dir, exist_ok=True)
+        # Memory-mapped store, so every process using the cache directory shares its pages
+        self.env = _open_environment(self.cache_dir)
+        # Built lazily from the stored entries on the first similarity lookup
+        self.semantic_cache = None
+        # LMDB transaction id the similarity index reflects; every write by any process moves it
+        self._semantic_txnid = None
+        self._semantic_cache_lock = threading.Lock()
         
     def _get_cache_key(self, query):
         """Generate a cache key for a query"""
-        return hashlib.md5(query.encode()).hexdigest()
-    
-    def _get_cache_file_path(self, cache_key):
-        """Get the file path for a cache key"""
-        return os.path.join(self.cache_dir, f"{cache_key}.pkl")
+        return hashlib.md5(query.encode()).hexdigest().encode()
     
     def get_cached_result(self, query):
         """Retrieve cached result for a query"""
         cache_key = self._get_cache_key(query)
-        cache_file = self._get_cache_file_path(cache_key)
         
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'rb') as f:
-                    cached_data = pickle.load(f)
-                    
-                # Check if cache is still valid
-                if time.time() - cached_data['timestamp'] < CACHE_TTL:
-                    return cached_data['result']
-                else:
-                    # Remove expired cache
-                    os.remove(cache_file)
-            except Exception as e:
-                print(f"Error reading cache: {e}")
+        with self.env.begin() as txn:
+            data = txn.get(cache_key)
+        if data is None:
+            return None
+            
+        try:
+            cached_data = pickle.loads(data)
+            
+            # Check if cache is still valid
+            if time.time() - cached_data['timestamp'] < CACHE_TTL:
+                return cached_data['result']
+            else:
+                # Remove expired cache
+                with self.env.begin(write=True) as txn:
+                    txn.delete(cache_key)
+        except Exception as e:
+            print(f"Error reading cache: {e}")
                 
         return None
     
-    def cache_result(self, query, result):
-        """Cache a result for a query"""
+    def semantic_get(self, query_embedding):
+        """Retrieve the cached result of the most similar earlier query"""
+        # Rebuild when entries were added or removed since loading, e.g. by a worker or a cache clear
+        if self._semantic_cache_stale():
+            with self._semantic_cache_lock:
+                if self._semantic_cache_stale():
+                    self._load_semantic_cache(query_embedding.shape[1])
+            
+        cached = self.semantic_cache.get(query_embedding)
+        if cached is not None and time.time() - cached[1] < CACHE_TTL:
+            return cached[0]
+        return None
+    
+    def _semantic_cache_stale(self):
+        """Check whether the similarity index is missing or behind the stored entries"""
+        return self.semantic_cache is None or self.env.info()['last_txnid'] != self._semantic_txnid
+    
+    def _load_semantic_cache(self, dimension):
+        """Index the embeddings stored alongside unexpired cache entries"""
+        semantic_cache = SemanticCache(dimension)
+        now = time.time()
+        
+        with self.env.begin() as txn:
+            txnid = txn.id()
+            for _, data in txn.cursor():
+                try:
+                    cached_data = pickle.loads(data)
+                except Exception as e:
+                    print(f"Error reading cache: {e}")
+                    continue
+                    
+                embedding = cached_data.get('embedding')
+                if embedding is not None and now - cached_data['timestamp'] < CACHE_TTL:
+                    semantic_cache.add(embedding, (cached_data['result'], cached_data['timestamp']))
+        # Published only once filled, so other threads never search a half-built index
+        self.semantic_cache = semantic_cache
+        self._semantic_txnid = txnid
+    
+    def cache_result(self, query, result, query_embedding=None):
+        """Cache a result for a query, with its normalized embedding for similarity lookups"""
         # Check cache size and clean if needed
         self._clean_cache_if_needed()
         
         cache_key = self._get_cache_key(query)
-        cache_file = self._get_cache_file_path(cache_key)
         
         cached_data = {
             'query': query,
             'result': result,
-            'timestamp': time.time()
+            'timestamp': time.time(),
+            'embedding': query_embedding
         }
         
         try:
-            with open(cache_file, 'wb') as f:
-                pickle.dump(cached_data, f)
+            with self.env.begin(write=True) as txn:
+                txn.put(cache_key, pickle.dumps(cached_data))
+                txnid = txn.id()
         except Exception as e:
             print(f"Error writing cache: {e}")
+            return
+            
+        if query_embedding is not None and self.semantic_cache is not None:
+            self.semantic_cache.add(query_embedding, (result, cached_data['timestamp']))
+            # Our own write directly after the loaded state keeps the index current
+            if self._semantic_txnid == txnid - 1:
+                self._semantic_txnid = txnid
     
     def _clean_cache_if_needed(self):
         """Clean cache if it exceeds maximum size"""
         try:
-            cache_files = [f for f in os.listdir(self.cache_dir) if f.endswith('.pkl')]
+            total_items = self.env.stat()['entries']
             
-            if len(cache_files) >= CACHE_MAX_SIZE:
-                # Remove oldest cache files
-                cache_files_with_time = []
-                for f in cache_files:
-                    file_path = os.path.join(self.cache_dir, f)
-                    cache_files_with_time.append((file_path, os.path.getmtime(file_path)))
+            if total_items >= CACHE_MAX_SIZE:
+                with self.env.begin(write=True) as txn:
+                    # Remove oldest entries
+                    entries_with_time = [
+                        (key, pickle.loads(data)['timestamp'])
+                        for key, data in txn.cursor()
+                    ]
+                    entries_with_time.sort(key=lambda x: x[1])
                     
-                # Sort by modification time (oldest first)
-                cache_files_with_time.sort(key=lambda x: x[1])
-                
-                # Remove oldest files
-                files_to_remove = len(cache_files) - CACHE_MAX_SIZE + 10  # Keep some buffer
-                for i in range(min(files_to_remove, len(cache_files_with_time))):
-                    os.remove(cache_files_with_time[i][0])
+                    entries_to_remove = total_items - CACHE_MAX_SIZE + 10  # Keep some buffer
+                    for key, _ in entries_with_time[:entries_to_remove]:
+                        txn.delete(key)
         except Exception as e:
             print(f"Error cleaning cache: {e}")
             
+    def clear_cache(self):
+        """Remove all cached results, returning (items_removed, bytes_freed)"""
+        with self.env.begin(write=True) as txn:
+            db = self.env.open_db(txn=txn)
+            stat = txn.stat(db)
+            txn.drop(db, delete=False)
+                    
+        if self.semantic_cache is not None:
+            self.semantic_cache.clear()
+                    
+        return stat['entries'], _stored_bytes(stat)
+            
     def get_cache_stats(self):
         """Get cache statistics"""
         try:
-            cache_files = [f for f in os.listdir(self.cache_dir) if f.endswith('.pkl')]
-            total_size = sum(os.path.getsize(os.path.join(self.cache_dir, f)) for f in cache_files)
-            
+            stat = self.env.stat()
             return {
-                'total_items': len(cache_files),
-                'total_size_bytes': total_size,
+                'total_items': stat['entries'],
+                'total_size_bytes': _stored_bytes(stat),
                 'max_size': CACHE_MAX_SIZE,
                 'ttl_hours': CACHE_TTL / 3600
             }
@@ -111,4 +190,4 @@ class CacheManager:
                 'total_size_bytes': 0,
                 'max_size': CACHE_MAX_SIZE,
                 'ttl_hours': CACHE_TTL / 3600
-            }
\ No newline at end of file
+            }
@@ -0,0 +1,49 @@
+import faiss
+import numpy as np
+import threading
+
+# Try to import settings, use fallback if not available
+try:
+    from config.settings import SEMANTIC_CACHE_THRESHOLD, CACHE_MAX_SIZE
+except ImportError:
+    # Fallback configuration
+    SEMANTIC_CACHE_THRESHOLD = 0.95  # cosine similarity for a paraphrase to reuse a cached answer
+    CACHE_MAX_SIZE = 1000
+
+class SemanticCache:
+    def __init__(self, dimension, threshold=SEMANTIC_CACHE_THRESHOLD, max_size=CACHE_MAX_SIZE):
+        """Initialize an in-memory cache of answers keyed by normalized question embedding"""
+        self.index = faiss.IndexFlatIP(dimension)
+        self.threshold = threshold
+        self.max_size = max_size
+        self.answers = []
+        # Queries run on threadpool and worker threads; eviction renumbers the index and answers together
+        self._lock = threading.Lock()
+
+    def get(self, embedding):
+        """Return the cached answer of the most similar question, if close enough"""
+        with self._lock:
+            if self.index.ntotal == 0:
+                return None
+
+            distances, indices = self.index.search(embedding, 1)
+            if distances[0, 0] > self.threshold:
+                return self.answers[indices[0, 0]]
+            return None
+
+    def add(self, embedding, answer):
+        """Cache an answer, evicting the oldest entry when full"""
+        with self._lock:
+            if self.index.ntotal >= self.max_size:
+                # A flat index renumbers after removal, so the oldest entry is always id 0
+                self.index.remove_ids(np.array([0], dtype=np.int64))
+                del self.answers[0]
+
+            self.index.add(embedding)
+            self.answers.append(answer)
+
+    def clear(self):
+        """Remove all cached answers"""
+        with self._lock:
+            self.index.reset()
+            self.answers.clear()
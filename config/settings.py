@@ -0,0 +1,60 @@
+import os
+import sys
+from pathlib import Path
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+DOCUMENTS_DIR = DATA_DIR / "documents"
+CACHE_DIR = DATA_DIR / "cache"
+EMBEDDINGS_DIR = PROJECT_ROOT / "embeddings"
+CELERY_RESULTS_DIR = DATA_DIR / "celery_results"
+FAISS_INDEX_FILE = EMBEDDINGS_DIR / "faiss_index.bin"
+FAISS_METADATA_FILE = EMBEDDINGS_DIR / "metadata.json"
+
+# API
+API_HOST = "0.0.0.0"
+API_PORT = 8080
+API_TITLE = "Local RAG API"
+API_DESCRIPTION = "Local RAG API with Celery job queues"
+API_VERSION = "1.0.0"
+
+# Models
+LLM_MODEL_ID = "meta-llama/Llama-3.2-1B"
+EMBEDDING_MODEL_ID = "all-MiniLM-L6-v2"
+MAX_NEW_TOKENS = 150
+TEMPERATURE = 0.7
+TOP_P = 0.95
+LLM_PROMPT_CACHE_BYTES = 512 * 1024 * 1024  # KV state kept for reuse by prompts sharing a prefix
+
+# Document processing and retrieval
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+TOP_K_RESULTS = 5
+EMBEDDING_BATCH_SIZE = 64  # chunks embedded and indexed per batch while processing documents
+FAISS_INDEX_FACTORY = "HNSW32"  # faiss.index_factory string for new document indexes
+FAISS_HNSW_EF_CONSTRUCTION = 200
+FAISS_HNSW_EF_SEARCH = 64  # higher trades search speed for recall
+FAISS_MMAP_INDEX = True  # memory-map the saved index read-only so worker processes share it
+FAISS_QUANTIZE = False  # compress vectors with product quantization (~32 bytes instead of 1536)
+FAISS_PQ_FACTORY = "OPQ32_128,IVF256,PQ32"
+FAISS_PQ_TRAINING_SIZE = 256 * 39  # vectors collected before training; smaller corpora stay exact
+FAISS_IVF_NPROBE = 16  # inverted lists visited per search
+
+# Response caching
+CACHE_TTL = 24 * 60 * 60  # 24 hours
+CACHE_MAX_SIZE = 1000
+CACHE_MAP_SIZE = 1 << 30  # upper bound on the LMDB cache store size in bytes
+SEMANTIC_CACHE_THRESHOLD = 0.95  # cosine similarity for a paraphrase to reuse a cached answer
+
+# Celery
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "memory://")
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "cache+memory://")
+CELERY_TASK_SERIALIZER = "json"
+CELERY_RESULT_SERIALIZER = "json"
+CELERY_ACCEPT_CONTENT = ["json"]
+CELERY_TIMEZONE = "UTC"
+CELERY_ENABLE_UTC = True
+TASK_TIMEOUT = 300  # 5 minutes
+CELERY_POOL = os.getenv("CELERY_POOL", "threads" if sys.platform == "win32" else "prefork")
+CELERY_WORKER_CONCURRENCY = int(os.getenv("CELERY_WORKER_CONCURRENCY", "2"))
@@ -5,9 +5,10 @@ import os
 
 # Try to import settings, use fallback if not available
 try:
-    from config.settings import EMBEDDING_MODEL_ID
+    from config.settings import EMBEDDING_MODEL_ID, EMBEDDING_BATCH_SIZE
 except ImportError:
     EMBEDDING_MODEL_ID = "all-MiniLM-L6-v2"
+    EMBEDDING_BATCH_SIZE = 64
 
 class EmbeddingModel:
     def __init__(self):
@@ -20,11 +21,16 @@ class EmbeddingModel:
         if self.model is None:
             print("Loading embedding model...")
             self.model = SentenceTransformer(EMBEDDING_MODEL_ID)
+            if torch.cuda.is_available():
+                # Half precision halves weight and activation traffic on GPU; CPUs without
+                # native fp16/bf16 matmuls are faster in fp32, so they keep it
+                self.model.half()
+            self.model.eval()
             self.dim = self.model.get_sentence_embedding_dimension()
             print("Embedding model loaded successfully")
         
     def encode(self, texts):
-        """Encode texts into embeddings"""
+        """Encode texts into unit-length float32 embeddings"""
         if self.model is None:
             self.load_model()
             
@@ -33,14 +39,17 @@ class EmbeddingModel:
             texts = [texts]
             
         # Generate embeddings
-        with torch.no_grad():
+        with torch.inference_mode():
             embeddings = self.model.encode(
                 texts, 
+                batch_size=EMBEDDING_BATCH_SIZE,
+                normalize_embeddings=True,
                 convert_to_numpy=True,
                 show_progress_bar=False
             )
             
-        return embeddings
+        # FAISS and the caches work in float32 whatever precision the model ran in
+        return embeddings.astype(np.float32, copy=False)
     
     def get_dimension(self):
         """Get the dimension of the embeddings"""
@@ -7,85 +7,196 @@ from pathlib import Path
 
 # Try to import settings, use fallback if not available
 try:
-    from config.settings import FAISS_INDEX_FILE, FAISS_METADATA_FILE, EMBEDDINGS_DIR
+    from config.settings import (
+        FAISS_INDEX_FILE,
+        FAISS_METADATA_FILE,
+        EMBEDDINGS_DIR,
+        FAISS_INDEX_FACTORY,
+        FAISS_HNSW_EF_CONSTRUCTION,
+        FAISS_HNSW_EF_SEARCH,
+        FAISS_MMAP_INDEX,
+        FAISS_QUANTIZE,
+        FAISS_PQ_FACTORY,
+        FAISS_PQ_TRAINING_SIZE,
+        FAISS_IVF_NPROBE
+    )
 except ImportError:
     # Fallback configuration
     PROJECT_ROOT = Path(__file__).parent.parent
     EMBEDDINGS_DIR = PROJECT_ROOT / "embeddings"
     FAISS_INDEX_FILE = EMBEDDINGS_DIR / "faiss_index.bin"
     FAISS_METADATA_FILE = EMBEDDINGS_DIR / "metadata.json"
+    FAISS_INDEX_FACTORY = "HNSW32"
+    FAISS_HNSW_EF_CONSTRUCTION = 200
+    FAISS_HNSW_EF_SEARCH = 64
+    FAISS_MMAP_INDEX = True
+    FAISS_QUANTIZE = False
+    FAISS_PQ_FACTORY = "OPQ32_128,IVF256,PQ32"
+    FAISS_PQ_TRAINING_SIZE = 256 * 39
+    FAISS_IVF_NPROBE = 16
 
 class FaissStorage:
-    def __init__(self, dimension):
+    def __init__(self, dimension, factory_string=None, quantize=FAISS_QUANTIZE):
         """Initialize FAISS storage"""
         self.dimension = dimension
+        # faiss.index_factory description of new indexes, e.g. "HNSW32" or "Flat" for exact search
+        if factory_string is None:
+            factory_string = FAISS_PQ_FACTORY if quantize else FAISS_INDEX_FACTORY
+        self.factory_string = factory_string
         self.index = None
         self.metadata = []
+        # Embeddings and metadata held back until an untrained index has enough to train on
+        self._pending_embeddings = []
+        self._pending_metadata = []
+        # Modification time of the index file this instance last loaded or wrote
+        self.index_mtime = None
+        # Whether the index is a read-only memory map of the index file
+        self.read_only = False
         
         # Create embeddings directory if it doesn't exist
         os.makedirs(EMBEDDINGS_DIR, exist_ok=True)
         
-    def initialize_index(self):
+    def initialize_index(self, mmap=FAISS_MMAP_INDEX):
         """Initialize or load the FAISS index"""
         if os.path.exists(FAISS_INDEX_FILE):
             print("Loading existing FAISS index...")
-            self.index = faiss.read_index(str(FAISS_INDEX_FILE))
+            if mmap:
+                # Processes mapping the same file share its pages instead of each holding a copy;
+                # IO_FLAG_MMAP alone only maps IVF lists, MMAP_IFC also maps flat and HNSW storage
+                self.index = faiss.read_index(str(FAISS_INDEX_FILE), faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+            else:
+                self.index = faiss.read_index(str(FAISS_INDEX_FILE))
+            self.read_only = mmap
+            self._set_search_params(self.index)
             # Load metadata
             if os.path.exists(FAISS_METADATA_FILE):
                 with open(FAISS_METADATA_FILE, 'r') as f:
                     self.metadata = json.load(f)
+            self.index_mtime = os.stat(FAISS_INDEX_FILE).st_mtime_ns
         else:
             print("Creating new FAISS index...")
-            self.index = faiss.IndexFlatIP(self.dimension)
+            self.index = self._new_index()
+            self.read_only = False
+            
+    def _new_index(self):
+        """Build an empty inner product index from the factory string"""
+        index = faiss.index_factory(self.dimension, self.factory_string, faiss.METRIC_INNER_PRODUCT)
+        if hasattr(index, 'hnsw'):
+            index.hnsw.efConstruction = FAISS_HNSW_EF_CONSTRUCTION
+        self._set_search_params(index)
+        return index
+        
+    def _set_search_params(self, index):
+        """Apply the runtime search parameters to an index"""
+        if hasattr(index, 'hnsw'):
+            index.hnsw.efSearch = FAISS_HNSW_EF_SEARCH
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.nprobe = FAISS_IVF_NPROBE
+            ivf = faiss.downcast_index(ivf)
+            if isinstance(ivf, faiss.IndexIVFPQ):
+                # L2 IVFPQ precomputes nlist * M * 256 floats, often more than the codes themselves
+                ivf.use_precomputed_table = -1
+                ivf.precomputed_table.resize(0)
             
-    def add_embeddings(self, embeddings, metadata_list):
+    def add_embeddings(self, embeddings, metadata_list, save=True):
         """Add embeddings and metadata to the index"""
-        if self.index is None:
-            self.initialize_index()
+        if self.index is None or self.read_only:
+            # Writes need the index in memory rather than mapped read-only
+            self.initialize_index(mmap=False)
             
         # Normalize embeddings for inner product search
         faiss.normalize_L2(embeddings)
         
-        # Add to index
-        self.index.add(embeddings)
-        
-        # Add metadata
-        self.metadata.extend(metadata_list)
+        if not self.index.is_trained:
+            # Quantized indexes learn their codebooks from the first vectors added
+            self._pending_embeddings.append(embeddings)
+            self._pending_metadata.extend(metadata_list)
+            if len(self._pending_metadata) >= FAISS_PQ_TRAINING_SIZE:
+                self._train_pending()
+        else:
+            # Add to index
+            self.index.add(embeddings)
+            
+            # Add metadata
+            self.metadata.extend(metadata_list)
         
         # Save index and metadata
-        self.save_index()
+        if save:
+            self.save_index()
         
     def search(self, query_embedding, k=5):
         """Search for similar embeddings"""
+        return self.search_batch(query_embedding, k)[0]
+        
+    def search_batch(self, query_embeddings, k=5):
+        """Search for similar embeddings of every query row in one FAISS call"""
         if self.index is None:
             self.initialize_index()
             
         if self.index.ntotal == 0:
-            return [], []
+            return [([], []) for _ in range(len(query_embeddings))]
             
-        # Normalize query embedding
-        faiss.normalize_L2(query_embedding)
+        # Normalize query embeddings
+        faiss.normalize_L2(query_embeddings)
         
         # Search
-        distances, indices = self.index.search(query_embedding, min(k, self.index.ntotal))
+        distances, indices = self.index.search(query_embeddings, min(k, self.index.ntotal))
         
-        # Get metadata for results
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < len(self.metadata):
-                results.append({
-                    'metadata': self.metadata[idx],
-                    'distance': float(distances[0][i])
-                })
-                
-        return results, distances[0]
+        # Get metadata for each query's results
+        batch_results = []
+        for row_distances, row_indices in zip(distances, indices):
+            results = []
+            for i, idx in enumerate(row_indices):
+                # Approximate indexes pad missing neighbours with -1
+                if 0 <= idx < len(self.metadata):
+                    results.append({
+                        'metadata': self.metadata[idx],
+                        'distance': float(row_distances[i])
+                    })
+            batch_results.append((results, row_distances))
+            
+        return batch_results
+        
+    def _train_pending(self):
+        """Train the index on the held back embeddings and add them"""
+        embeddings = np.concatenate(self._pending_embeddings)
+        if len(embeddings) < FAISS_PQ_TRAINING_SIZE:
+            # Too few vectors to learn codebooks from; a corpus this small is cheap to keep exact
+            self.index = faiss.IndexFlatIP(self.dimension)
+        else:
+            print(f"Training FAISS index on {len(embeddings)} vectors...")
+            self.index.train(embeddings)
+        self.index.add(embeddings)
+        self.metadata.extend(self._pending_metadata)
+        self._pending_embeddings = []
+        self._pending_metadata = []
         
     def save_index(self):
         """Save the index and metadata to disk"""
+        if self._pending_metadata:
+            self._train_pending()
         if self.index is not None:
-            faiss.write_index(self.index, str(FAISS_INDEX_FILE))
-            with open(FAISS_METADATA_FILE, 'w') as f:
+            # Write beside the old files and swap them in, so processes that have the old
+            # index mapped keep reading an intact file instead of one rewritten in place
+            index_tmp = f"{FAISS_INDEX_FILE}.tmp"
+            faiss.write_index(self.index, index_tmp)
+            metadata_tmp = f"{FAISS_METADATA_FILE}.tmp"
+            with open(metadata_tmp, 'w') as f:
                 json.dump(self.metadata, f)
+            os.replace(metadata_tmp, FAISS_METADATA_FILE)
+            os.replace(index_tmp, FAISS_INDEX_FILE)
+            self.index_mtime = os.stat(FAISS_INDEX_FILE).st_mtime_ns
+                
+    def reload_if_changed(self):
+        """Reload the index if another process has rewritten it since it was loaded"""
+        try:
+            mtime = os.stat(FAISS_INDEX_FILE).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self.index_mtime:
+            self.metadata = []
+            self.initialize_index()
                 
     def get_total_vectors(self):
         """Get the total number of vectors in the index"""
@@ -95,7 +206,10 @@ class FaissStorage:
         
     def clear_index(self):
         """Clear the index and metadata"""
-        self.index = faiss.IndexFlatIP(self.dimension)
+        self.index = self._new_index()
+        self.read_only = False
         self.metadata = []
+        self._pending_embeddings = []
+        self._pending_metadata = []
         self.save_index()
         print("Index cleared successfully")
\ No newline at end of file
@@ -1,29 +1,39 @@
-from llama_cpp import Llama
+from llama_cpp import Llama, LlamaRAMCache
+import threading
 
 # Try to import settings, use fallback if not available
 try:
-    from config.settings import MAX_NEW_TOKENS, TEMPERATURE, TOP_P
+    from config.settings import MAX_NEW_TOKENS, TEMPERATURE, TOP_P, LLM_PROMPT_CACHE_BYTES
 except ImportError:
     MAX_NEW_TOKENS = 150
     TEMPERATURE = 0.7
     TOP_P = 0.95
+    LLM_PROMPT_CACHE_BYTES = 512 * 1024 * 1024
 
 # Global variable for the model
 model = None
+# A Llama instance is not thread-safe, so loading and generation are serialized
+_model_lock = threading.Lock()
 
 def load_model():
     """Load the GGUF LLM model"""
     global model
     
     if model is None:
-        print("Loading Llama 3.2 1B GGUF model...")
-        model = Llama.from_pretrained(
-            repo_id="bartowski/Llama-3.2-1B-Instruct-GGUF",
-            filename="Llama-3.2-1B-Instruct-Q4_K_M.gguf",
-            n_ctx=2048,  # Set context window to 2048 tokens
-            verbose=False  # Reduce verbose output
-        )
-        print("GGUF model loaded successfully!")
+        with _model_lock:
+            if model is None:
+                print("Loading Llama 3.2 1B GGUF model...")
+                llm = Llama.from_pretrained(
+                    repo_id="bartowski/Llama-3.2-1B-Instruct-GGUF",
+                    filename="Llama-3.2-1B-Instruct-Q4_K_M.gguf",
+                    n_ctx=2048,  # Set context window to 2048 tokens
+                    verbose=False  # Reduce verbose output
+                )
+                # Keep the KV state of recent prompts so a prompt starting with the same
+                # retrieved context only evaluates the tokens that follow it
+                llm.set_cache(LlamaRAMCache(capacity_bytes=LLM_PROMPT_CACHE_BYTES))
+                model = llm
+                print("GGUF model loaded successfully!")
     return model
 
 def generate_response(prompt):
@@ -59,18 +69,20 @@ def generate_response(prompt):
         else:
             full_prompt = prompt
     
-    # Generate response using chat completion
-    response = model.create_chat_completion(
-        messages=[
-            {
-                "role": "user",
-                "content": full_prompt
-            }
-        ],
-        max_tokens=MAX_NEW_TOKENS,
-        temperature=TEMPERATURE,
-        top_p=TOP_P
-    )
+    # Generate response using chat completion; llama.cpp releases the GIL while it
+    # evaluates, so other threads keep running during generation
+    with _model_lock:
+        response = model.create_chat_completion(
+            messages=[
+                {
+                    "role": "user",
+                    "content": full_prompt
+                }
+            ],
+            max_tokens=MAX_NEW_TOKENS,
+            temperature=TEMPERATURE,
+            top_p=TOP_P
+        )
     
     # Extract and return the answer
     # Handle different response formats
@@ -10,6 +10,7 @@ import sys
 import os
 import multiprocessing
 import signal
+import threading
 import time
 from pathlib import Path
 
@@ -17,20 +18,32 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
+# Seconds to wait for the API (including model loading) before starting the worker anyway
+API_STARTUP_TIMEOUT = 60
+
 def start_celery_worker():
     """Start Celery worker process"""
     from tasks.celery_app import celery_app
     
-    print("Starting Celery worker...")
+    try:
+        from config.settings import CELERY_POOL, CELERY_WORKER_CONCURRENCY
+    except ImportError:
+        # Prefork children each hold their own engine and run outside the GIL;
+        # Windows has no fork, so it keeps the threads pool
+        CELERY_POOL = os.getenv("CELERY_POOL", "threads" if sys.platform == "win32" else "prefork")
+        # Generation runs on the local CPU, so more children than this just contend for cores
+        CELERY_WORKER_CONCURRENCY = int(os.getenv("CELERY_WORKER_CONCURRENCY", "2"))
+    
+    print(f"Starting Celery worker ({CELERY_POOL} pool, concurrency {CELERY_WORKER_CONCURRENCY})...")
     celery_app.worker_main([
         'worker',
         '--loglevel=info',
-        '--concurrency=2',
-        '--pool=threads'  # Use threads for better compatibility
+        f'--concurrency={CELERY_WORKER_CONCURRENCY}',
+        f'--pool={CELERY_POOL}'
     ])
 
-def start_fastapi_server():
-    """Start FastAPI server"""
+def start_fastapi_server(ready_event=None):
+    """Start FastAPI server, setting ready_event once it accepts connections"""
     import uvicorn
     
     try:
@@ -41,13 +54,27 @@ def start_fastapi_server():
         print("⚠️  Using fallback API configuration")
     
     print(f"Starting FastAPI server on {API_HOST}:{API_PORT}...")
-    uvicorn.run(
+    server = uvicorn.Server(uvicorn.Config(
         "api.app:app",
         host=API_HOST,
         port=API_PORT,
+        loop="uvloop" if sys.platform != "win32" else "asyncio",
+        http="httptools",
         log_level="info",
-        access_log=True
-    )
+        access_log=False
+    ))
+    
+    if ready_event is not None:
+        threading.Thread(target=_signal_when_started, args=(server, ready_event), daemon=True).start()
+    
+    server.run()
+
+def _signal_when_started(server, ready_event):
+    """Set ready_event once uvicorn has finished startup, including the app lifespan"""
+    while not server.started and not server.should_exit:
+        time.sleep(0.05)
+    if server.started:
+        ready_event.set()
 
 def signal_handler(signum, frame):
     """Handle shutdown signals"""
@@ -103,12 +130,14 @@ def main():
             print("Starting both FastAPI server and Celery worker...")
             
             # Create processes
-            api_process = multiprocessing.Process(target=start_fastapi_server, name="FastAPI")
+            api_ready = multiprocessing.Event()
+            api_process = multiprocessing.Process(target=start_fastapi_server, args=(api_ready,), name="FastAPI")
             worker_process = multiprocessing.Process(target=start_celery_worker, name="Celery")
             
-            # Start processes
+            # Start the worker as soon as the API is up rather than after a fixed delay
             api_process.start()
-            time.sleep(2)  # Give FastAPI a moment to start
+            if not api_ready.wait(timeout=API_STARTUP_TIMEOUT):
+                print(f"⚠️  FastAPI not ready after {API_STARTUP_TIMEOUT}s, starting Celery worker anyway")
             worker_process.start()
             
             print("\n" + "=" * 60)
@@ -136,8 +165,11 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    # Set multiprocessing start method for compatibility
-    if sys.platform != "win32":
+    # fork starts the child processes without re-importing this module, but a CUDA
+    # context cannot survive a fork, so fall back to spawn once torch.cuda is loaded
+    if sys.platform == "linux" and "torch.cuda" not in sys.modules:
+        multiprocessing.set_start_method("fork", force=True)
+    elif sys.platform != "win32":
         multiprocessing.set_start_method("spawn", force=True)
     
     main()
\ No newline at end of file
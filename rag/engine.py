@@ -6,6 +6,7 @@ from rag.processor import DocumentProcessor
 from rag.retriever import Retriever
 from cache.manager import CacheManager
 from llm import generate_response
+import itertools
 import time
 
 class RAGEngine:
@@ -21,9 +22,10 @@ class RAGEngine:
     def process_documents(self):
         """Process and index all documents"""
         print("Loading documents...")
-        documents = self.document_processor.load_documents()
+        documents = self.document_processor.iter_documents()
+        first_document = next(documents, None)
         
-        if not documents:
+        if first_document is None:
             print("No documents found to process")
             return {
                 'status': 'completed',
@@ -31,41 +33,75 @@ class RAGEngine:
                 'message': 'No documents found in data/documents/ directory'
             }
             
-        print(f"Processing {len(documents)} documents...")
+        print("Processing documents...")
         
         # Clear existing index before adding new documents
         self.retriever.clear_index()
         
-        # Add documents to retriever
-        self.retriever.add_documents(documents)
+        # Stream documents into the retriever, which embeds their chunks in batches
+        document_count = self.retriever.add_documents(itertools.chain([first_document], documents))
         
-        print("Document processing complete")
+        print(f"Document processing complete: {document_count} documents")
         
         return {
             'status': 'completed',
-            'documents_processed': len(documents),
-            'message': f'Successfully processed {len(documents)} documents'
+            'documents_processed': document_count,
+            'message': f'Successfully processed {document_count} documents'
         }
         
-    def query(self, question):
+    def query(self, question, query_embedding=None):
         """Process a query through the RAG pipeline"""
         start_time = time.time()
         
-        # Check cache first
+        # Check the exact-match cache first, then answers to similar questions
         cached_result = self.cache_manager.get_cached_result(question)
+        if not cached_result:
+            # Embed the question once for both the cache lookup and retrieval
+            if query_embedding is None:
+                query_embedding = self.retriever.embed_query(question)
+            cached_result = self.cache_manager.semantic_get(query_embedding)
         if cached_result:
-            print("Using cached result")
-            return {
-                'answer': cached_result,
-                'source': 'cache',
-                'processing_time': time.time() - start_time,
-                'retrieved_chunks': 0
-            }
+            return self._cached_response(cached_result, start_time)
             
         # Retrieve relevant documents
         print("Retrieving relevant documents...")
-        results, distances = self.retriever.search(question)
+        results, distances = self.retriever.search(question, query_embedding=query_embedding)
+        
+        return self._generate(question, query_embedding, results, start_time)
+    
+    def query_batch(self, questions, query_embeddings=None):
+        """Process several queries, yielding each result as soon as it is ready"""
+        if query_embeddings is None:
+            query_embeddings = self.retriever.embed_query(questions)
+            
+        # Retrieve context for the whole batch with one FAISS search
+        print(f"Retrieving relevant documents for {len(questions)} questions...")
+        batch_results = self.retriever.search_batch(query_embeddings)
         
+        for i, question in enumerate(questions):
+            start_time = time.time()
+            query_embedding = query_embeddings[i:i + 1]
+            
+            # Checked per question so repeats within the batch reuse answers generated earlier in it
+            cached_result = self.cache_manager.get_cached_result(question) or self.cache_manager.semantic_get(query_embedding)
+            if cached_result:
+                yield self._cached_response(cached_result, start_time)
+            else:
+                yield self._generate(question, query_embedding, batch_results[i][0], start_time)
+    
+    def _cached_response(self, cached_result, start_time):
+        """Build the query result for a cached answer"""
+        print("Using cached result")
+        return {
+            'answer': cached_result,
+            'source': 'cache',
+            'processing_time': time.time() - start_time,
+            'retrieved_chunks': 0,
+            'context_used': False
+        }
+    
+    def _generate(self, question, query_embedding, results, start_time):
+        """Generate, cache and return an answer from the retrieved chunks"""
         # Format context
         context = "\n".join([result['metadata']['content'] for result in results])
         
@@ -83,7 +119,7 @@ class RAGEngine:
         print(f"Response generated in {processing_time:.2f} seconds")
         
         # Cache the result
-        self.cache_manager.cache_result(question, answer)
+        self.cache_manager.cache_result(question, answer, query_embedding)
         
         return {
             'answer': answer,
@@ -12,81 +12,120 @@ except ImportError:
     CHUNK_SIZE = 500
     CHUNK_OVERLAP = 50
 
+# Sentence boundaries used for chunking, compiled once
+SENTENCE_BOUNDARY = re.compile(r'[.!?]+')
+
+def chunk_text(text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """Split text into chunks with overlap"""
+    chunks = []
+    
+    # Split text into stripped, non-empty sentences without a Python-level filter
+    sentences = filter(None, map(str.strip, SENTENCE_BOUNDARY.split(text)))
+    
+    current_chunk = ""
+    for sentence in sentences:
+        # Check if adding this sentence would exceed chunk size
+        if len(current_chunk) + len(sentence) + 1 <= chunk_size:
+            # CPython extends the string in place here, so this stays linear
+            current_chunk += " " + sentence if current_chunk else sentence
+        else:
+            # Add current chunk to chunks
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+                
+            # Start new chunk with overlap
+            # Take last 'overlap' characters from current chunk as start of new chunk
+            if len(current_chunk) > overlap:
+                current_chunk = current_chunk[-overlap:] + " " + sentence
+            else:
+                current_chunk = sentence
+                
+    # Add the last chunk
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+        
+    return chunks
+
 class DocumentProcessor:
     def __init__(self):
         """Initialize document processor"""
-        pass
+        # Statistics of documents already read, keyed by path: (mtime_ns, size, characters, chunks)
+        self._document_stats = {}
     
     def load_documents(self):
         """Load all documents from the documents directory"""
-        documents = []
-        
+        return list(self.iter_documents())
+    
+    def iter_documents(self):
+        """Yield the documents in the documents directory one at a time"""
+        for entry in self._iter_text_files():
+            document = self._read_document(entry)
+            if document is not None:
+                yield document
+    
+    def _iter_text_files(self):
+        """Yield the directory entries of the .txt files in the documents directory"""
         if not os.path.exists(DOCUMENTS_DIR):
             print(f"Documents directory {DOCUMENTS_DIR} does not exist")
             os.makedirs(DOCUMENTS_DIR, exist_ok=True)
-            return documents
+            return
             
-        for filename in os.listdir(DOCUMENTS_DIR):
-            file_path = os.path.join(DOCUMENTS_DIR, filename)
-            if os.path.isfile(file_path) and filename.endswith('.txt'):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        documents.append({
-                            'content': content,
-                            'filename': filename,
-                            'path': file_path
-                        })
-                except Exception as e:
-                    print(f"Error reading {filename}: {e}")
-                    
-        return documents
+        # scandir entries carry the path and file type, so only .txt files get stat'ed
+        with os.scandir(DOCUMENTS_DIR) as entries:
+            for entry in entries:
+                if entry.name.endswith('.txt') and entry.is_file():
+                    yield entry
+    
+    def _read_document(self, entry):
+        """Read a document from its directory entry"""
+        try:
+            with open(entry.path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            return {
+                'content': content,
+                'filename': entry.name,
+                'path': entry.path
+            }
+        except Exception as e:
+            print(f"Error reading {entry.name}: {e}")
+            return None
     
     def chunk_text(self, text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
         """Split text into chunks with overlap"""
-        chunks = []
-        
-        # Split text into sentences
-        sentences = re.split(r'[.!?]+', text)
-        
-        current_chunk = ""
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-                
-            # Check if adding this sentence would exceed chunk size
-            if len(current_chunk) + len(sentence) + 1 <= chunk_size:
-                current_chunk += " " + sentence if current_chunk else sentence
-            else:
-                # Add current chunk to chunks
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                    
-                # Start new chunk with overlap
-                # Take last 'overlap' characters from current chunk as start of new chunk
-                if len(current_chunk) > overlap:
-                    current_chunk = current_chunk[-overlap:] + " " + sentence
-                else:
-                    current_chunk = sentence
-                    
-        # Add the last chunk
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-            
-        return chunks
+        return chunk_text(text, chunk_size, overlap)
     
     def get_document_stats(self):
         """Get statistics about documents in the directory"""
-        documents = self.load_documents()
-        total_docs = len(documents)
-        total_chars = sum(len(doc['content']) for doc in documents)
-        
-        # Estimate total chunks
+        total_docs = 0
+        total_chars = 0
         total_chunks = 0
-        for doc in documents:
-            chunks = self.chunk_text(doc['content'])
-            total_chunks += len(chunks)
+        seen_paths = set()
+        
+        for entry in self._iter_text_files():
+            try:
+                file_stat = entry.stat()
+            except OSError as e:
+                print(f"Error reading {entry.name}: {e}")
+                continue
+                
+            # Only new or changed files are read and chunked again; no document text is kept
+            stats = self._document_stats.get(entry.path)
+            if stats is None or stats[0] != file_stat.st_mtime_ns or stats[1] != file_stat.st_size:
+                document = self._read_document(entry)
+                if document is None:
+                    continue
+                content = document['content']
+                stats = (file_stat.st_mtime_ns, file_stat.st_size, len(content), len(self.chunk_text(content)))
+                self._document_stats[entry.path] = stats
+                
+            seen_paths.add(entry.path)
+            total_docs += 1
+            total_chars += stats[2]
+            total_chunks += stats[3]
+            
+        # Forget files that have been removed
+        for file_path in self._document_stats.keys() - seen_paths:
+            del self._document_stats[file_path]
             
         return {
             'total_documents': total_docs,
@@ -94,4 +133,4 @@ class DocumentProcessor:
             'estimated_chunks': total_chunks,
             'chunk_size': CHUNK_SIZE,
             'chunk_overlap': CHUNK_OVERLAP
-        }
\ No newline at end of file
+        }
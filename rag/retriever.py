@@ -1,12 +1,14 @@
 import numpy as np
 from embeddings.model import EmbeddingModel
 from embeddings.storage import FaissStorage
+from rag.processor import chunk_text
 
 # Try to import settings, use fallback if not available
 try:
-    from config.settings import TOP_K_RESULTS
+    from config.settings import TOP_K_RESULTS, EMBEDDING_BATCH_SIZE
 except ImportError:
     TOP_K_RESULTS = 5
+    EMBEDDING_BATCH_SIZE = 64  # chunks embedded and indexed per batch while processing documents
 
 class Retriever:
     def __init__(self):
@@ -24,87 +26,79 @@ class Retriever:
         self.faiss_storage = FaissStorage(dim)
         self.faiss_storage.initialize_index()
         
-    def search(self, query, k=TOP_K_RESULTS):
-        """Search for relevant documents given a query"""
+    def search(self, query, k=TOP_K_RESULTS, query_embedding=None):
+        """Search for relevant documents given a query or its precomputed embedding"""
         if self.faiss_storage is None:
             self.initialize()
             
         # Generate query embedding
-        query_embedding = self.embedding_model.encode(query)
+        if query_embedding is None:
+            query_embedding = self.embedding_model.encode(query)
         
         # Search in FAISS
         results, distances = self.faiss_storage.search(query_embedding, k)
         
         return results, distances
     
+    def search_batch(self, query_embeddings, k=TOP_K_RESULTS):
+        """Search for relevant documents for several precomputed query embeddings at once"""
+        if self.faiss_storage is None:
+            self.initialize()
+            
+        return self.faiss_storage.search_batch(query_embeddings, k)
+    
+    def embed_query(self, query):
+        """Embed a query as a normalized float32 row for cosine similarity search"""
+        # The embedding model already returns unit-length rows
+        return np.ascontiguousarray(self.embedding_model.encode(query), dtype=np.float32)
+    
     def add_documents(self, documents):
-        """Add documents to the retrieval system"""
+        """Add documents to the retrieval system, returning how many were added"""
         if self.faiss_storage is None:
             self.initialize()
             
-        all_chunks = []
-        all_metadata = []
+        document_count = 0
+        chunk_buffer = []
+        metadata_buffer = []
         
         for doc in documents:
+            document_count += 1
+            
             # Chunk the document
             chunks = self.chunk_text(doc['content'])
             
-            # Create embeddings for chunks
-            if chunks:
-                embeddings = self.embedding_model.encode(chunks)
+            # Create metadata for each chunk
+            for i, chunk in enumerate(chunks):
+                chunk_buffer.append(chunk)
+                metadata_buffer.append({
+                    'content': chunk,
+                    'source_file': doc['filename'],
+                    'chunk_index': i
+                })
                 
-                # Create metadata for each chunk
-                for i, chunk in enumerate(chunks):
-                    metadata = {
-                        'content': chunk,
-                        'source_file': doc['filename'],
-                        'chunk_index': i
-                    }
-                    all_metadata.append(metadata)
-                    
-                # Add embeddings and metadata
-                all_chunks.append(embeddings)
+            # Embed and index full batches so memory stays bounded by the batch size
+            if len(chunk_buffer) >= EMBEDDING_BATCH_SIZE:
+                self._add_chunks(chunk_buffer, metadata_buffer)
+                chunk_buffer = []
+                metadata_buffer = []
                 
-        if all_chunks:
-            # Combine all embeddings
-            combined_embeddings = np.vstack(all_chunks)
-            # Add to FAISS
-            self.faiss_storage.add_embeddings(combined_embeddings, all_metadata)
+        if chunk_buffer:
+            self._add_chunks(chunk_buffer, metadata_buffer)
+            
+        # Write the index to disk once, after every batch is in
+        if document_count:
+            self.faiss_storage.save_index()
+            
+        return document_count
+    
+    def _add_chunks(self, chunks, metadata_list):
+        """Embed a batch of chunks and add them to FAISS without saving"""
+        embeddings = np.ascontiguousarray(self.embedding_model.encode(chunks), dtype=np.float32)
+        self.faiss_storage.add_embeddings(embeddings, metadata_list, save=False)
             
     def chunk_text(self, text, chunk_size=500, overlap=50):
         """Split text into chunks with overlap"""
-        import re
-        chunks = []
-        
-        # Split text into sentences
-        sentences = re.split(r'[.!?]+', text)
-        
-        current_chunk = ""
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-                
-            # Check if adding this sentence would exceed chunk size
-            if len(current_chunk) + len(sentence) + 1 <= chunk_size:
-                current_chunk += " " + sentence if current_chunk else sentence
-            else:
-                # Add current chunk to chunks
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                    
-                # Start new chunk with overlap
-                # Take last 'overlap' characters from current chunk as start of new chunk
-                if len(current_chunk) > overlap:
-                    current_chunk = current_chunk[-overlap:] + " " + sentence
-                else:
-                    current_chunk = sentence
-                    
-        # Add the last chunk
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-            
-        return chunks
+        return chunk_text(text, chunk_size, overlap)
     
     def get_index_stats(self):
         """Get statistics about the search index"""
@@ -1,7 +1,17 @@
 import os
+import threading
+from contextlib import contextmanager
 from celery import Celery
+from celery.signals import worker_process_init
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
 # Try to import settings, use fallback if not available
 try:
     from config.settings import (
@@ -13,6 +23,7 @@ try:
         CELERY_TIMEZONE,
         CELERY_ENABLE_UTC,
         CELERY_RESULTS_DIR,
+        FAISS_INDEX_FILE,
         TASK_TIMEOUT
     )
     # Override with memory broker if SQLite is configured (not supported)
@@ -25,6 +36,7 @@ except ImportError:
     PROJECT_ROOT = Path(__file__).parent.parent
     DATA_DIR = PROJECT_ROOT / "data"
     CELERY_RESULTS_DIR = DATA_DIR / "celery_results"
+    FAISS_INDEX_FILE = PROJECT_ROOT / "embeddings" / "faiss_index.bin"
     
     # Use memory broker for development (simple, no external dependencies)
     CELERY_BROKER_URL = "memory://"
@@ -37,11 +49,17 @@ except ImportError:
     TASK_TIMEOUT = 300
     print("⚠️  Using fallback Celery configuration")
 
+# The memory broker only reaches workers in this same process, so tasks run inline unless
+# CELERY_TASK_ALWAYS_EAGER=0; point the broker at Redis/RabbitMQ to use separate workers
+TASK_ALWAYS_EAGER = os.getenv(
+    "CELERY_TASK_ALWAYS_EAGER", str(CELERY_BROKER_URL.startswith("memory://"))
+).lower() in ("1", "true")
+
 # Create celery results directory
 os.makedirs(CELERY_RESULTS_DIR, exist_ok=True)
 
-# Create Celery app
-celery_app = Celery('rag_tasks')
+# Create Celery app; the worker imports the task modules listed here at startup
+celery_app = Celery('rag_tasks', include=['tasks.document_tasks', 'tasks.query_tasks'])
 
 # Configure Celery
 config_dict = {
@@ -59,12 +77,73 @@ config_dict = {
     'worker_disable_rate_limits': True,
     'task_ignore_result': False,
     'result_expires': 3600,  # Results expire after 1 hour
+    'task_always_eager': TASK_ALWAYS_EAGER,
+    'task_store_eager_result': True,  # Keep inline results visible to the task status endpoints
+    # Reuse a bounded pool of broker connections for task submission instead of reconnecting
+    'broker_pool_limit': 10,
+    'broker_connection_retry_on_startup': True,
+    # Keep idle result backend connections (e.g. Redis) open between status checks
+    'result_backend_transport_options': {'socket_keepalive': True},
 }
 
 celery_app.conf.update(config_dict)
 
-# Auto-discover tasks
-celery_app.autodiscover_tasks(['tasks'])
+# One RAG engine per worker process, shared by every task it runs
+_rag_engine = None
+_rag_engine_lock = threading.Lock()
+
+# Lock file held while the index is rewritten; a file lock also serializes prefork children
+INDEX_LOCK_FILE = f"{FAISS_INDEX_FILE}.lock"
+
+@contextmanager
+def index_write_lock():
+    """Hold the index lock, so rewrites from different processes and threads do not interleave"""
+    with open(INDEX_LOCK_FILE, 'a+b') as lock_file:
+        if fcntl is not None:
+            # Released when the file is closed
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+            return
+        lock_file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                # LK_LOCK gives up after 10 seconds; keep waiting like flock does
+                pass
+        try:
+            yield
+        finally:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def get_engine():
+    """Get this process's RAG engine, building it on first use"""
+    global _rag_engine
+    if _rag_engine is None:
+        with _rag_engine_lock:
+            if _rag_engine is None:
+                from rag.engine import RAGEngine
+                _rag_engine = RAGEngine()
+    else:
+        # Pick up an index rebuilt by another process since the engine loaded it
+        _rag_engine.retriever.faiss_storage.reload_if_changed()
+    return _rag_engine
+
+def set_engine(engine):
+    """Use an engine built elsewhere in this process, e.g. the API's when tasks run inline"""
+    global _rag_engine
+    _rag_engine = engine
+
+@worker_process_init.connect
+def init_worker_engine(**kwargs):
+    """Load models and the index as each prefork child starts, before it takes tasks"""
+    try:
+        get_engine()
+    except Exception as e:
+        # Dying here makes the pool respawn the child in a loop; tasks retry the load and fail instead
+        print(f"Error initializing RAG engine in worker process: {e}")
 
 if __name__ == '__main__':
     celery_app.start()
\ No newline at end of file
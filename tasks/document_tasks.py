@@ -1,94 +1,66 @@
-from tasks.celery_app import celery_app
-from rag.engine import RAGEngine
-import time
+from tasks.celery_app import celery_app, get_engine, index_write_lock
 
 @celery_app.task(bind=True)
 def process_documents_async(self):
     """Asynchronously process documents and build search index"""
-    try:
-        # Update task state
-        self.update_state(
-            state='PROGRESS',
-            meta={'status': 'Initializing RAG engine...', 'progress': 10}
-        )
-        
-        # Initialize RAG engine
-        rag_engine = RAGEngine()
-        
-        # Update task state
-        self.update_state(
-            state='PROGRESS',
-            meta={'status': 'Processing documents...', 'progress': 30}
-        )
-        
-        # Process documents
+    # Update task state
+    self.update_state(
+        state='PROGRESS',
+        meta={'status': 'Initializing RAG engine...', 'progress': 10}
+    )
+    
+    # Reuse this worker's RAG engine
+    rag_engine = get_engine()
+    
+    # Update task state
+    self.update_state(
+        state='PROGRESS',
+        meta={'status': 'Processing documents...', 'progress': 30}
+    )
+    
+    # Process documents
+    with index_write_lock():
         result = rag_engine.process_documents()
-        
-        # Update task state
-        self.update_state(
-            state='PROGRESS',
-            meta={'status': 'Building search index...', 'progress': 80}
-        )
-        
-        # Small delay to show progress
-        time.sleep(1)
-        
-        # Final result
-        return {
-            'status': 'completed',
-            'result': result,
-            'progress': 100,
-            'message': 'Document processing completed successfully'
-        }
-        
-    except Exception as exc:
-        # Update task state with error
-        self.update_state(
-            state='FAILURE',
-            meta={
-                'status': 'Error occurred during document processing',
-                'error': str(exc),
-                'progress': 0
-            }
-        )
-        raise exc
+    
+    # Update task state
+    self.update_state(
+        state='PROGRESS',
+        meta={'status': 'Building search index...', 'progress': 80}
+    )
+    
+    # Final result
+    return {
+        'status': 'completed',
+        'result': result,
+        'progress': 100,
+        'message': 'Document processing completed successfully'
+    }
 
 @celery_app.task(bind=True)
 def clear_index_async(self):
     """Asynchronously clear the search index"""
-    try:
-        # Update task state
-        self.update_state(
-            state='PROGRESS',
-            meta={'status': 'Clearing search index...', 'progress': 50}
-        )
-        
-        # Initialize RAG engine and clear index
-        rag_engine = RAGEngine()
+    # Update task state
+    self.update_state(
+        state='PROGRESS',
+        meta={'status': 'Clearing search index...', 'progress': 50}
+    )
+    
+    # Clear the index of this worker's RAG engine
+    rag_engine = get_engine()
+    with index_write_lock():
         rag_engine.retriever.clear_index()
-        
-        return {
-            'status': 'completed',
-            'progress': 100,
-            'message': 'Search index cleared successfully'
-        }
-        
-    except Exception as exc:
-        self.update_state(
-            state='FAILURE',
-            meta={
-                'status': 'Error occurred while clearing index',
-                'error': str(exc),
-                'progress': 0
-            }
-        )
-        raise exc
+    
+    return {
+        'status': 'completed',
+        'progress': 100,
+        'message': 'Search index cleared successfully'
+    }
 
 @celery_app.task
 def get_document_stats_async():
     """Get document statistics asynchronously"""
     try:
-        rag_engine = RAGEngine()
+        rag_engine = get_engine()
         stats = rag_engine.get_system_stats()
         
         return {
@@ -1,83 +1,100 @@
-from tasks.celery_app import celery_app
-from rag.engine import RAGEngine
+from tasks.celery_app import celery_app, get_engine, CELERY_RESULTS_DIR
+from datetime import timedelta
+from pathlib import Path
+import numpy as np
+import base64
+import orjson
+import os
 import time
 
+def batch_results_path(task_id):
+    """Path of the JSON Lines file holding the answers of a batch query task"""
+    return Path(CELERY_RESULTS_DIR) / f"{task_id}.jsonl"
+
+def remove_expired_batch_results():
+    """Delete batch result files older than the result backend keeps task results"""
+    expires = celery_app.conf.result_expires
+    if isinstance(expires, timedelta):
+        expires = expires.total_seconds()
+    if not expires:
+        return
+    cutoff = time.time() - expires
+    with os.scandir(CELERY_RESULTS_DIR) as entries:
+        for entry in entries:
+            if entry.name.endswith('.jsonl') and entry.is_file() and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
 @celery_app.task(bind=True)
 def process_query_async(self, question):
     """Asynchronously process a RAG query"""
-    try:
-        # Update task state
-        self.update_state(
-            state='PROGRESS',
-            meta={'status': 'Initializing RAG engine...', 'progress': 10}
-        )
-        
-        # Initialize RAG engine
-        rag_engine = RAGEngine()
-        
-        # Update task state
-        self.update_state(
-            state='PROGRESS',
-            meta={'status': 'Searching for relevant documents...', 'progress': 30}
-        )
-        
-        # Small delay to show progress for demo purposes
-        time.sleep(0.5)
-        
-        # Update task state
-        self.update_state(
-            state='PROGRESS',
-            meta={'status': 'Generating response...', 'progress': 60}
-        )
-        
-        # Process the query
-        result = rag_engine.query(question)
-        
-        # Update task state
-        self.update_state(
-            state='PROGRESS',
-            meta={'status': 'Finalizing response...', 'progress': 90}
-        )
-        
-        # Small delay
-        time.sleep(0.2)
-        
-        # Return final result
-        return {
-            'status': 'completed',
-            'question': question,
-            'answer': result['answer'],
-            'source': result['source'],
-            'processing_time': result['processing_time'],
-            'retrieved_chunks': result['retrieved_chunks'],
-            'context_used': result['context_used'],
-            'progress': 100,
-            'message': 'Query processed successfully'
-        }
-        
-    except Exception as exc:
-        # Update task state with error
-        self.update_state(
-            state='FAILURE',
-            meta={
-                'status': 'Error occurred during query processing',
-                'error': str(exc),
-                'question': question,
-                'progress': 0
-            }
-        )
-        raise exc
+    # Update task state
+    self.update_state(
+        state='PROGRESS',
+        meta={'status': 'Initializing RAG engine...', 'progress': 10}
+    )
+    
+    # Reuse this worker's RAG engine
+    rag_engine = get_engine()
+    
+    # Update task state
+    self.update_state(
+        state='PROGRESS',
+        meta={'status': 'Searching for relevant documents...', 'progress': 30}
+    )
+    
+    # Update task state
+    self.update_state(
+        state='PROGRESS',
+        meta={'status': 'Generating response...', 'progress': 60}
+    )
+    
+    # Process the query
+    result = rag_engine.query(question)
+    
+    # Update task state
+    self.update_state(
+        state='PROGRESS',
+        meta={'status': 'Finalizing response...', 'progress': 90}
+    )
+    
+    # Return final result
+    return {
+        'status': 'completed',
+        'question': question,
+        'answer': result['answer'],
+        'source': result['source'],
+        'processing_time': result['processing_time'],
+        'retrieved_chunks': result['retrieved_chunks'],
+        'context_used': result['context_used'],
+        'progress': 100,
+        'message': 'Query processed successfully'
+    }
 
 @celery_app.task(bind=True)
-def batch_query_async(self, questions):
+def batch_query_async(self, questions, embeddings=None):
     """Process multiple queries asynchronously"""
-    try:
-        results = []
-        total_questions = len(questions)
-        
-        # Initialize RAG engine
-        rag_engine = RAGEngine()
-        
+    total_questions = len(questions)
+    
+    # Reuse this worker's RAG engine
+    rag_engine = get_engine()
+    
+    # Embed all questions in one forward pass unless the API already did
+    if embeddings is None:
+        embeddings = rag_engine.retriever.embed_query(questions)
+    else:
+        embeddings = np.frombuffer(base64.b64decode(embeddings), dtype=np.float32)
+        embeddings = embeddings.reshape(total_questions, -1).copy()
+    
+    # Retrieval for the whole batch happens up front; answers are generated one by one
+    batch_results = rag_engine.query_batch(questions, embeddings)
+    
+    # Answers are written to disk as they are generated instead of being kept in
+    # memory and shipped through the result backend in one piece
+    remove_expired_batch_results()
+    with open(batch_results_path(self.request.id), 'wb') as results_file:
         for i, question in enumerate(questions):
             # Update progress
             progress = int((i / total_questions) * 90)  # Reserve 10% for finalization
@@ -91,36 +108,26 @@ def batch_query_async(self, questions):
             )
             
             # Process the query
-            result = rag_engine.query(question)
-            results.append({
+            result = next(batch_results)
+            results_file.write(orjson.dumps({
                 'question': question,
                 'answer': result['answer'],
                 'source': result['source'],
                 'processing_time': result['processing_time'],
                 'retrieved_chunks': result['retrieved_chunks']
-            })
-        
-        # Final update
-        self.update_state(
-            state='PROGRESS',
-            meta={'status': 'Finalizing batch results...', 'progress': 95}
-        )
-        
-        return {
-            'status': 'completed',
-            'total_questions': total_questions,
-            'results': results,
-            'progress': 100,
-            'message': f'Successfully processed {total_questions} questions'
-        }
-        
-    except Exception as exc:
-        self.update_state(
-            state='FAILURE',
-            meta={
-                'status': 'Error occurred during batch query processing',
-                'error': str(exc),
-                'progress': 0
-            }
-        )
-        raise exc
\ No newline at end of file
+            }) + b'\n')
+            results_file.flush()
+    
+    # Final update
+    self.update_state(
+        state='PROGRESS',
+        meta={'status': 'Finalizing batch results...', 'progress': 95}
+    )
+    
+    return {
+        'status': 'completed',
+        'total_questions': total_questions,
+        'results_url': f'/query/{self.request.id}/results',
+        'progress': 100,
+        'message': f'Successfully processed {total_questions} questions'
+    }
\ No newline at end of file
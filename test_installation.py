@@ -6,16 +6,73 @@ This script verifies that all components can be imported and basic functionality
 
 import sys
 import os
+import contextlib
+import functools
+import importlib
+import importlib.util
+import io
+import multiprocessing
 from pathlib import Path
 
-# Add project root to Python path
-PROJECT_ROOT = Path(__file__).parent
-sys.path.insert(0, str(PROJECT_ROOT))
+# Add project root to Python path, unless running the script already put it there
+PROJECT_ROOT = Path(__file__).resolve().parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# ML dependencies, imported once on first use since each pulls in hundreds of submodules
+HEAVY_MODULES = ("torch", "transformers", "sentence_transformers", "faiss", "numpy")
+REQUIRED_MODULES = ("fastapi", "uvicorn", "celery", "pydantic") + HEAVY_MODULES
+
+def _missing_modules(names):
+    """Names of modules that are not installed, found without importing anything"""
+    return [name for name in names if name not in sys.modules and importlib.util.find_spec(name) is None]
+
+@functools.lru_cache(maxsize=None)
+def _heavy_imports():
+    """Import the ML dependencies, returning the ones that failed"""
+    # Don't pay for importing torch when a dependency is missing anyway
+    missing = _missing_modules(HEAVY_MODULES)
+    if missing:
+        return tuple(f"{name} (not installed)" for name in missing)
+        
+    failed = []
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            failed.append(f"{name} ({e})")
+    return tuple(failed)
+
+# Test client shared by every API check, created on first use
+_CLIENT = None
+
+def _client():
+    """Return the shared FastAPI test client, building the app only once"""
+    global _CLIENT
+    if _CLIENT is None:
+        from api.app import app
+        from fastapi.testclient import TestClient
+        # Run the client's event loop on uvloop where it is available (it has no Windows build)
+        backend_options = {}
+        if sys.platform != "win32":
+            try:
+                import uvloop
+                backend_options["use_uvloop"] = True
+            except ImportError:
+                pass
+        _CLIENT = TestClient(app, backend_options=backend_options)
+    return _CLIENT
 
 def test_imports():
     """Test that all required modules can be imported"""
     print("Testing imports...")
     
+    # Fail fast, before any multi-second import, if something is not installed at all
+    missing = _missing_modules(REQUIRED_MODULES)
+    if missing:
+        print(f"❌ Missing modules: {', '.join(missing)}")
+        return False
+    
     try:
         # Core dependencies
         import fastapi
@@ -25,11 +82,10 @@ def test_imports():
         print("✓ FastAPI, Uvicorn, Celery, Pydantic")
         
         # ML dependencies
-        import torch
-        import transformers
-        import sentence_transformers
-        import faiss
-        import numpy as np
+        failed = _heavy_imports()
+        if failed:
+            print(f"❌ Import error: {', '.join(failed)}")
+            return False
         print("✓ PyTorch, Transformers, Sentence-Transformers, FAISS, NumPy")
         
         # Project modules
@@ -68,12 +124,13 @@ def test_directories():
         directories = [DATA_DIR, DOCUMENTS_DIR, CACHE_DIR, EMBEDDINGS_DIR, CELERY_RESULTS_DIR]
         
         for directory in directories:
-            os.makedirs(directory, exist_ok=True)
-            if os.path.exists(directory):
-                print(f"✓ {directory}")
-            else:
-                print(f"❌ Failed to create {directory}")
+            # makedirs raises if the directory could not be created, so no separate exists check
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError as e:
+                print(f"❌ Failed to create {directory}: {e}")
                 return False
+            print(f"✓ {directory}")
                 
         return True
         
@@ -85,6 +142,12 @@ def test_basic_functionality():
     """Test basic functionality without heavy model loading"""
     print("\nTesting basic functionality...")
     
+    # Skip instead of retrying imports that already failed
+    failed = _heavy_imports()
+    if failed:
+        print(f"❌ Basic functionality error: missing {', '.join(failed)}")
+        return False
+    
     try:
         # Test cache manager
         from cache.manager import CacheManager
@@ -122,24 +185,18 @@ def test_api_structure():
     print("\nTesting API structure...")
     
     try:
-        from api.app import app
-        from fastapi.testclient import TestClient
-        
-        # Create test client
-        client = TestClient(app)
-        
         # Test root endpoint
-        response = client.get("/")
+        response = _client().get("/")
         assert response.status_code == 200
         print("✓ Root endpoint")
         
         # Test health endpoint
-        response = client.get("/system/health")
+        response = _client().get("/system/health")
         assert response.status_code == 200
         print("✓ Health endpoint")
         
         # Test info endpoint
-        response = client.get("/system/info")
+        response = _client().get("/system/info")
         assert response.status_code == 200
         print("✓ Info endpoint")
         
@@ -155,10 +212,11 @@ def test_celery_structure():
     
     try:
         from tasks.celery_app import celery_app
-        from tasks.document_tasks import process_documents_async
-        from tasks.query_tasks import process_query_async
         
-        # Check that tasks are registered
+        # Import the task modules the way a starting worker does and check they registered
+        celery_app.loader.import_default_modules()
+        assert 'tasks.document_tasks.process_documents_async' in celery_app.tasks
+        assert 'tasks.query_tasks.process_query_async' in celery_app.tasks
         registered_tasks = list(celery_app.tasks.keys())
         print(f"✓ Celery app with {len(registered_tasks)} registered tasks")
         
@@ -168,6 +226,14 @@ def test_celery_structure():
         print(f"❌ Celery structure error: {e}")
         return False
 
+def _run_test(test):
+    """Run one named test in a worker process, capturing what it prints"""
+    test_name, test_func = test
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        passed = test_func()
+    return test_name, passed, output.getvalue()
+
 def main():
     """Run all installation tests"""
     print("=" * 60)
@@ -185,10 +251,15 @@ def main():
     passed = 0
     total = len(tests)
     
-    for test_name, test_func in tests:
+    # The tests are independent, so run them side by side; each process pays only for its own imports
+    with multiprocessing.Pool(processes=total) as pool:
+        results = pool.map(_run_test, tests)
+    
+    for test_name, test_passed, output in results:
         print(f"\n{test_name}:")
         print("-" * 40)
-        if test_func():
+        print(output, end="")
+        if test_passed:
             passed += 1
             print(f"✅ {test_name} PASSED")
         else: